@@ -0,0 +1,328 @@
+"""
+Screener JSON API
+Lightweight local HTTP service serving screens from the current snapshot,
+with results cached by (snapshot version, criteria, style, top_n) and
+ETag/304 support for polling clients. /export streams the whole ranked
+universe as CSV, Parquet or JSON Lines.
+
+Run with:
+    python api.py --port 8502 --universe all
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from export import EXPORT_FORMATS, iter_export
+from expressions import ExpressionError
+from refresh import refresh_stock_data
+from parallel import parallel_rank
+from screener import STYLE_WEIGHTS
+from snapshots import DEFAULT_UNIVERSE, list_snapshots, load_snapshot, save_snapshot, universe_dir
+from weight_sweep import load_custom_styles
+from data.universes import UNIVERSES
+
+RESULT_CACHE_SIZE = 512
+MAX_TOP_N = 1000
+
+_NUMERIC_KEYS = ('min_market_cap', 'max_market_cap', 'min_analysts', 'min_upside')
+
+
+class _SnapshotHolder:
+    """A universe's latest snapshot, reloaded only when its directory changes."""
+
+    def __init__(self, universe: str = DEFAULT_UNIVERSE):
+        self.universe = universe
+        self._lock = threading.Lock()
+        self._stamp = None
+        self.version: Optional[str] = None
+        self.df = pd.DataFrame()
+
+    def current(self) -> Tuple[Optional[str], pd.DataFrame]:
+        try:
+            stamp = universe_dir(self.universe).stat().st_mtime_ns
+        except FileNotFoundError:
+            stamp = None
+        # Version and frame are read together so a reload can't pair them up wrongly
+        with self._lock:
+            if stamp != self._stamp:
+                versions = list_snapshots(universe=self.universe)
+                if versions and versions[-1] != self.version:
+                    self.df = load_snapshot(versions[-1], universe=self.universe)
+                    self.version = versions[-1]
+                self._stamp = stamp
+            return self.version, self.df
+
+
+class _ResultCache:
+    """Small thread-safe LRU of rendered responses keyed by request hash."""
+
+    def __init__(self, size: int = RESULT_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = size
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._items.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: str, body: bytes):
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self._size:
+                self._items.popitem(last=False)
+
+
+def normalize_request(criteria: Dict, style: str, top_n: int) -> Dict:
+    """
+    Canonical form of a screen request, so equivalent requests share a key.
+
+    Inactive criteria (unset, zero, False, empty) are dropped, sector lists
+    are sorted and numbers become floats.
+
+    Raises:
+        ValueError: If a field has the wrong type or is out of range
+    """
+    if not isinstance(criteria, dict):
+        raise ValueError("criteria must be an object")
+    normalized = {}
+    sectors = criteria.get('sectors')
+    if sectors:
+        if not isinstance(sectors, list) or not all(isinstance(s, str) for s in sectors):
+            raise ValueError("sectors must be a list of strings")
+        normalized['sectors'] = sorted(set(sectors))
+    for key in _NUMERIC_KEYS:
+        value = criteria.get(key)
+        if value:
+            normalized[key] = float(value)
+    if criteria.get('buy_ratings_only'):
+        normalized['buy_ratings_only'] = True
+    expression = criteria.get('expression') or ''
+    if not isinstance(expression, str):
+        raise ValueError("expression must be a string")
+    if expression.strip():
+        normalized['expression'] = expression.strip()
+
+    if style is not None and not isinstance(style, str):
+        raise ValueError("style must be a string")
+    style = (style or 'blend').lower()
+    if style not in STYLE_WEIGHTS:
+        raise ValueError(f"Unknown style {style!r}; choose from {sorted(STYLE_WEIGHTS)}")
+    top_n = int(top_n)
+    if not 1 <= top_n <= MAX_TOP_N:
+        raise ValueError(f"top_n must be between 1 and {MAX_TOP_N}")
+
+    return {'criteria': normalized, 'style': style, 'top_n': top_n}
+
+
+def request_key(version: Optional[str], request: Dict) -> str:
+    """Hash of the snapshot version and normalized request."""
+    payload = json.dumps({'snapshot': version, **request}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render_screen(df: pd.DataFrame, version: Optional[str], request: Dict) -> bytes:
+    """Run a screen against a snapshot and serialize it as JSON."""
+    ranked, passed = parallel_rank(df, request['criteria'], request['style'], request['top_n'])
+    results = ranked.to_json(orient='records') if not ranked.empty else '[]'
+    meta = json.dumps({
+        'snapshot': version,
+        'screened': len(df),
+        'passed': passed,
+        **request,
+    })
+    # Splice the records in rather than round-tripping them through json
+    return (meta[:-1] + ', "results": ' + results + '}').encode()
+
+
+def _criteria_from_query(query: Dict[str, list]) -> Tuple[Dict, str, int]:
+    def first(name, default=None):
+        values = query.get(name)
+        return values[0] if values else default
+
+    criteria = {}
+    if first('sectors'):
+        criteria['sectors'] = [s.strip() for s in first('sectors').split(',') if s.strip()]
+    for key in _NUMERIC_KEYS:
+        if first(key) is not None:
+            criteria[key] = float(first(key))
+    if first('buy_ratings_only', '').lower() in ('1', 'true', 'yes'):
+        criteria['buy_ratings_only'] = True
+    if first('expression'):
+        criteria['expression'] = first('expression')
+    return criteria, first('style', 'blend'), int(first('top_n', 20))
+
+
+class ScreenerHandler(BaseHTTPRequestHandler):
+    """GET/POST /screen, GET /export, GET /snapshot, GET /health."""
+
+    protocol_version = 'HTTP/1.1'
+    # Buffer headers and body into one write and skip Nagle's delay,
+    # otherwise keep-alive clients stall ~40 ms per response
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    snapshots = _SnapshotHolder()
+    cache = _ResultCache()
+
+    def log_message(self, format, *args):
+        # Polling clients would flood the console
+        pass
+
+    def _send(self, status: int, body: bytes = b'', headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, json.dumps({'error': message}).encode())
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            self._send(200, b'{"status": "ok"}')
+        elif url.path == '/snapshot':
+            version, df = self.snapshots.current()
+            self._send(200, json.dumps({
+                'universe': self.snapshots.universe,
+                'snapshot': version,
+                'tickers': len(df),
+                'cache': {'hits': self.cache.hits, 'misses': self.cache.misses},
+            }).encode())
+        elif url.path == '/screen':
+            try:
+                criteria, style, top_n = _criteria_from_query(parse_qs(url.query))
+            except ValueError as e:
+                return self._error(400, str(e))
+            self._screen(criteria, style, top_n)
+        elif url.path == '/export':
+            self._export(parse_qs(url.query))
+        else:
+            self._error(404, f"Unknown path {url.path}")
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/screen':
+            return self._error(404, f"Unknown path {self.path}")
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            criteria = body.get('criteria', {})
+            style = body.get('style', 'blend')
+            top_n = body.get('top_n', 20)
+        except (ValueError, AttributeError) as e:
+            return self._error(400, f"Invalid JSON body: {e}")
+        self._screen(criteria, style, top_n)
+
+    def _screen(self, criteria: Dict, style: str, top_n):
+        version, df = self.snapshots.current()
+        if version is None:
+            return self._error(503, "No snapshot yet; run a screen in the app or start the API with --refresh-minutes")
+        try:
+            request = normalize_request(criteria, style, top_n)
+        except (TypeError, ValueError) as e:
+            return self._error(400, str(e))
+
+        key = request_key(version, request)
+        etag = f'"{key[:32]}"'
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, headers={'ETag': etag})
+
+        body = self.cache.get(key)
+        if body is None:
+            try:
+                body = render_screen(df, version, request)
+            except ExpressionError as e:
+                return self._error(400, f"Invalid expression: {e}")
+            self.cache.put(key, body)
+        self._send(200, body, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+    def _export(self, query: Dict[str, list]):
+        """Stream the whole ranked universe with chunked transfer encoding."""
+        version, df = self.snapshots.current()
+        if version is None:
+            return self._error(503, "No snapshot yet; run a screen in the app or start the API with --refresh-minutes")
+        try:
+            criteria, style, _ = _criteria_from_query(query)
+            request = normalize_request(criteria, style, 1)
+            fmt = query.get('format', ['csv'])[0].lower()
+            all_fields = query.get('all_fields', [''])[0].lower() in ('1', 'true', 'yes')
+            chunks = iter_export(df, fmt, request['criteria'], request['style'], all_fields)
+            # Run the filter and the first chunk now so bad input is still a 400
+            first = next(chunks, b'')
+        except ExpressionError as e:
+            return self._error(400, f"Invalid expression: {e}")
+        except (ImportError, ValueError) as e:
+            return self._error(400, str(e))
+
+        self.send_response(200)
+        self.send_header('Content-Type', EXPORT_FORMATS[fmt])
+        self.send_header('Content-Disposition', f'attachment; filename="screen-{version}.{fmt}"')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for data in itertools.chain([first], chunks):
+            if data:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+
+def _refresh_loop(minutes: float, universe: str):
+    """Periodically refresh the universe and store a new snapshot."""
+    tickers = UNIVERSES[universe]
+    while True:
+        df = refresh_stock_data(tickers)
+        if not df.empty:
+            save_snapshot(df, universe=universe)
+        time.sleep(minutes * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve InvestScout screens as JSON")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--refresh-minutes', type=float, default=None,
+                        help="Fetch the universe and store a new snapshot every N minutes")
+    parser.add_argument('--universe', choices=sorted(UNIVERSES), default=DEFAULT_UNIVERSE,
+                        help="Universe whose snapshots are served (see data/universes.py)")
+    args = parser.parse_args()
+
+    # Styles exported with weight_sweep.export_style can be requested by name
+    load_custom_styles()
+    ScreenerHandler.snapshots = _SnapshotHolder(args.universe)
+    if args.refresh_minutes:
+        threading.Thread(target=_refresh_loop, args=(args.refresh_minutes, args.universe), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), ScreenerHandler)
+    print(f"Serving {args.universe} screens on http://{args.host}:{args.port}/screen")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,17 +3,30 @@ InvestScout
 Discover high-potential investment candidates for your RRSP.
 """
 
+import io
+import uuid
+
 import streamlit as st
 import pandas as pd
-from screener import (
-    fetch_stock_data,
-    apply_filters,
-    rank_candidates,
-    get_signal,
-    format_market_cap,
-)
-from data.sp500 import SP500_TICKERS, SECTOR_MAP
-from data.tsx60 import TSX_TICKERS, TSX_SECTOR_MAP
+from screener import get_signals
+from diversify import correlation_matrix, diversified_top_n, load_price_history, returns_matrix
+from export import EXPORT_FORMATS, iter_export
+from expressions import ExpressionError, compile_expression
+from lookthrough import available_etfs, etf_lookthrough, flag_overlap, load_holdings
+from parallel import parallel_rank
+from peers import peer_factor_scores
+from prefetch import cancel_prefetch, request_prefetch
+from refresh import refresh_stock_data
+from snapshots import DIFF_FIELDS, diff_snapshots, load_snapshot, save_snapshot
+from statements import refresh_statements, statement_metrics
+from watchlists import WatchlistMonitor, load_screens, save_screen
+from weight_sweep import load_custom_styles
+from data.sp500 import SECTOR_MAP
+from data.tsx60 import TSX_SECTOR_MAP
+from data.universes import UNIVERSES
+
+# Result rows rendered per page
+PAGE_SIZE = 100
 
 # Page configuration
 st.set_page_config(
@@ -80,6 +93,17 @@ with st.sidebar:
         index=0,
         help="Choose which markets to include in your search"
     )
+    listings = st.selectbox(
+        "Share classes & cross-listings:",
+        options=["One per issuer (most liquid)", "One per issuer (prefer TSX/CAD)", "Show every listing"],
+        index=0,
+        help="""
+        Issuers listed more than once (GOOG/GOOGL, FOX/FOXA, TSX names also
+        listed in New York) are ranked once. Prefer TSX/CAD to hold the
+        Canadian listing in your RRSP and avoid currency conversion.
+        """
+    )
+    one_per_issuer = {"One per issuer (most liquid)": "liquid", "One per issuer (prefer TSX/CAD)": "cad"}.get(listings)
     
     st.markdown("---")
     
@@ -87,15 +111,34 @@ with st.sidebar:
     st.markdown("### 💼 Investing Style")
     style = st.selectbox(
         "What's your investment approach?",
-        options=["Blend", "Growth", "Value", "Dividend"],
+        options=["Blend", "Growth", "Value", "Dividend"] + list(load_custom_styles()),
         index=0,
         help="""
         • Growth: Focus on revenue/earnings growth
         • Value: Focus on undervalued stocks (low P/E, high upside)
         • Dividend: Focus on yield and payout sustainability
         • Blend: Balanced approach
+        • Custom styles exported from the weight optimizer appear below these
+        """
+    )
+    
+    score_against = st.selectbox(
+        "Score factors against:",
+        options=["Fixed thresholds", "Sector peers", "Industry peers"],
+        index=0,
+        help="""
+        • Fixed thresholds: P/E of 10, 5% yield, 50% growth = full marks for everyone
+        • Sector/Industry peers: each factor is scored against the stock's peers,
+          so a Utility's yield is compared with other Utilities
         """
     )
+    peer_method = st.radio(
+        "Peer comparison",
+        options=["Percentile", "Z-score"],
+        horizontal=True,
+        disabled=score_against == "Fixed thresholds",
+        help="Percentile: share of peers beaten. Z-score: distance from the peer average.",
+    )
     
     st.markdown("---")
     
@@ -169,19 +212,74 @@ with st.sidebar:
         help="Only show stocks with Buy or Strong Buy recommendations"
     )
     
+    use_statements = st.checkbox(
+        "Use financial statements",
+        value=False,
+        help="""
+        Adds revenue_cagr, fcf_payout_ratio and dividend_growth_streak from cached
+        quarterly/annual statements. The first run fetches every company; after that
+        only companies that have just reported are re-fetched.
+        """
+    )
+    
+    advanced_filter = st.text_input(
+        "Advanced filter",
+        placeholder="pe_ratio < 20 and dividend_yield > 0.03",
+        help="""
+        Combine any screener columns with and / or / not, comparisons,
+        + - * / and lists, e.g. sector in ['Energy', 'Utilities'] and market_cap > 5B.
+        Columns: price, target_price, upside_pct, pe_ratio, dividend_yield, payout_ratio,
+        revenue_growth, earnings_growth, recommendation, recommendation_mean, num_analysts,
+        market_cap, market_cap_usd, price_usd, currency, pct_from_high, sector, industry (and, with financial statements on,
+        revenue_cagr, fcf_payout_ratio, dividend_growth_streak)
+        """
+    )
+    if advanced_filter.strip():
+        try:
+            compile_expression(advanced_filter)
+        except ExpressionError as e:
+            st.error(f"Advanced filter: {e}")
+            advanced_filter = ""
+    
     st.markdown("---")
     
     # Number of results
-    top_n = st.slider(
+    top_n = st.number_input(
         "Number of candidates",
         min_value=5,
-        max_value=50,
+        max_value=1000,
         value=20,
-        help="How many top candidates to show"
+        step=5,
+        help="How many top candidates to show (large lists are paged)"
+    )
+    
+    diversify = st.checkbox(
+        "Diversify picks",
+        value=False,
+        help="Skip candidates whose daily returns are highly correlated with a higher-ranked pick (e.g. GOOG/GOOGL, several Canadian banks)"
+    )
+    max_corr = st.slider(
+        "Max correlation between picks",
+        min_value=0.5,
+        max_value=0.95,
+        value=0.8,
+        step=0.05,
+        disabled=not diversify,
     )
     
     st.markdown("---")
     
+    # Saved screens (re-checked on every fetch)
+    st.markdown("### 💾 Saved Screens")
+    screen_name = st.text_input(
+        "Save these criteria as:",
+        placeholder="e.g. Canadian dividend payers",
+        help="Saved screens are re-checked on every fetch and flag new matches"
+    )
+    save_button = st.button("Save Screen", use_container_width=True, disabled=not screen_name)
+    
+    st.markdown("---")
+    
     screen_button = st.button(
         "🔍 Find Candidates",
         type="primary",
@@ -196,6 +294,7 @@ criteria = {
     'min_analysts': min_analysts,
     'min_upside': min_upside,
     'buy_ratings_only': buy_only,
+    'expression': advanced_filter,
 }
 
 # Set market cap filters based on risk tolerance
@@ -206,18 +305,68 @@ elif risk == "Include Mid Cap":
 else:
     criteria['min_market_cap'] = 500e6  # $500M minimum for liquidity
 
+
+@st.cache_resource
+def get_watchlist_monitor(universe: str) -> WatchlistMonitor:
+    # One monitor per universe per server process, shared by every session
+    return WatchlistMonitor()
+
+
+# Universe (data/universes.py) behind each market selection; snapshots and
+# watchlist state are kept per universe
+MARKET_UNIVERSES = {
+    "Both US & Canadian": 'all',
+    "US Stocks Only": 'us',
+    "Canadian (TSX) Only": 'tsx',
+}
+
+
 # Get ticker list based on market selection
 def get_tickers(market_selection: str) -> list:
-    tickers = []
-    if market_selection in ["Both US & Canadian", "US Stocks Only"]:
-        tickers.extend(SP500_TICKERS)
-    if market_selection in ["Both US & Canadian", "Canadian (TSX) Only"]:
-        tickers.extend(TSX_TICKERS)
-    return tickers
+    return list(UNIVERSES[MARKET_UNIVERSES[market_selection]])
+
+
+if save_button and screen_name:
+    # The sidebar only checks the expression's syntax; check it against the
+    # data too (the latest results, else the market's last snapshot), so a
+    # misspelled or missing column isn't saved
+    if 'screen' in st.session_state:
+        sample = st.session_state['screen']['universe']
+    else:
+        sample = load_snapshot(universe=MARKET_UNIVERSES[market])
+    try:
+        if advanced_filter.strip() and not sample.empty:
+            compile_expression(advanced_filter)(sample)
+    except ExpressionError as e:
+        st.sidebar.error(f"❌ Not saved. Advanced filter: {e}")
+    else:
+        save_screen(screen_name, criteria, style, top_n)
+        st.sidebar.success(f"Saved screen '{screen_name}'")
+
+
+def prefetch_order(tickers: list, selected_sectors: list) -> list:
+    # Tickers in the chosen sectors first; the rest are still fetched by the screen
+    sector_of = {**SECTOR_MAP, **TSX_SECTOR_MAP}
+    chosen = set(selected_sectors)
+    return sorted(tickers, key=lambda t: sector_of.get(t) not in chosen)
+
+
+# Start warming the data for the current market/sector selection in the
+# background while the user adjusts the rest of the sidebar
+prefetch_owner = st.session_state.setdefault('prefetch_owner', uuid.uuid4().hex)
+if not screen_button:
+    request_prefetch(prefetch_owner, prefetch_order(get_tickers(market), sectors))
 
 # Screen stocks when button is clicked
 if screen_button:
     tickers = get_tickers(market)
+    # Anything the prefetch hasn't started is fetched by this screen instead
+    cancel_prefetch(prefetch_owner)
+    
+    # Results are kept in session state so paging and export reruns don't re-screen
+    st.session_state.pop('screen', None)
+    st.session_state.pop('results_csv', None)
+    st.session_state.pop('export_file', None)
     
     # Show progress
     progress_text = st.empty()
@@ -225,9 +374,9 @@ if screen_button:
     
     progress_text.text(f"📊 Fetching data for {len(tickers)} stocks...")
     
-    # Fetch data
+    # Fetch data (re-screens only refresh quotes; fundamentals are cached)
     with st.spinner("Fetching stock data... This may take 1-2 minutes."):
-        df = fetch_stock_data(tickers)
+        df = refresh_stock_data(tickers)
     
     progress_bar.progress(50)
     progress_text.text("🔍 Applying filters...")
@@ -235,128 +384,282 @@ if screen_button:
     if df.empty:
         st.error("❌ Could not fetch stock data. Please check your internet connection and try again.")
     else:
-        # Apply filters
-        filtered_df = apply_filters(df, criteria)
+        if use_statements:
+            progress_text.text("📑 Updating financial statements...")
+            reported = dict(zip(df['ticker'], df['most_recent_quarter']))
+            refresh_statements(df['ticker'].tolist(), reported)
+            metrics = statement_metrics(df['ticker'].tolist()).drop(columns=['latest_period'])
+            df = df.merge(metrics, on='ticker', how='left')
         
-        progress_bar.progress(75)
+        # Compare with the previous snapshot (ignoring pure price moves), then store this one
+        universe = MARKET_UNIVERSES[market]
+        previous = load_snapshot(universe=universe)
+        version = save_snapshot(df, universe=universe)
+        
+        # Peer-relative factor scores for the whole universe (cached per snapshot)
+        if score_against == "Fixed thresholds":
+            factors = None
+        else:
+            factors = peer_factor_scores(
+                df,
+                group='sector' if score_against == "Sector peers" else 'industry',
+                method=peer_method.lower().replace('-', ''),
+                version=version,
+            )
+        changes = diff_snapshots(
+            previous, df,
+            fields=[f for f in DIFF_FIELDS if f not in ('price', 'market_cap')],
+        ) if not previous.empty else pd.DataFrame()
+        
+        # Update saved screens, re-evaluating only tickers whose inputs changed
+        monitor = get_watchlist_monitor(universe)
+        with monitor.lock:
+            monitor.screens = load_screens()
+            touched = diff_snapshots(previous, df, fields=monitor.input_columns())['ticker'].unique()
+            alerts = monitor.update(df, touched)
+            broken = dict(monitor.broken)
+        alerts = alerts[alerts['event'] != 'rank_change']
+        
+        # Apply filters and rank (on a process pool for very large universes)
         progress_text.text("📈 Ranking candidates...")
+        try:
+            # With diversification, rank a deeper pool so skipped look-alikes can be replaced
+            ranked, passed = parallel_rank(
+                df, criteria, style.lower(), top_n * 5 if diversify else top_n,
+                factors=factors, one_per_issuer=one_per_issuer,
+            )
+        except ExpressionError as e:
+            st.error(f"❌ Advanced filter: {e}")
+            st.stop()
+        
+        progress_bar.progress(75)
         
-        if filtered_df.empty:
+        if not passed:
             st.warning("⚠️ No stocks match your criteria. Try relaxing some filters.")
         else:
-            # Rank and get top candidates
-            results = rank_candidates(filtered_df, style.lower(), top_n)
+            if diversify:
+                progress_text.text("🧮 Checking correlations...")
+                prices = load_price_history(ranked['ticker'].tolist())
+                corr = correlation_matrix(returns_matrix(prices))
+                results = diversified_top_n(ranked, corr, top_n, max_corr)
+            else:
+                results = ranked
+            
+            results['signal'] = get_signals(results)
+            
+            st.session_state['screen'] = {
+                'style': style,
+                'criteria': criteria,
+                'universe': df,
+                'factors': factors,
+                'one_per_issuer': one_per_issuer,
+                'screened': len(df),
+                'passed': passed,
+                'results': results,
+                'changes': changes,
+                'alerts': alerts,
+                'broken': broken,
+            }
             
             progress_bar.progress(100)
             progress_text.empty()
             progress_bar.empty()
-            
-            # Display summary metrics
-            st.markdown("---")
-            st.markdown("### 📊 Screening Results")
-            
-            metric_cols = st.columns(4)
-            with metric_cols[0]:
-                st.metric("Stocks Screened", len(df))
-            with metric_cols[1]:
-                st.metric("Passed Filters", len(filtered_df))
-            with metric_cols[2]:
-                avg_upside = results['upside_pct'].mean()
-                st.metric("Avg Upside", f"{avg_upside:.1f}%" if pd.notna(avg_upside) else "—")
-            with metric_cols[3]:
-                avg_score = results['score'].mean()
-                st.metric("Avg Score", f"{avg_score:.1f}")
-            
-            st.markdown("---")
-            st.markdown(f"### 🏆 Top {len(results)} Candidates ({style} Strategy)")
-            
-            # Add signal column
-            results['signal'] = results.apply(get_signal, axis=1)
-            
-            # Format display DataFrame
-            display_df = results[[
-                'ticker', 'name', 'price', 'target_price', 'upside_pct',
-                'recommendation', 'num_analysts', 'score', 'signal', 'market_cap', 'sector'
-            ]].copy()
-            
-            # Rename columns for display
-            display_df.columns = [
-                'Ticker', 'Company', 'Price', 'Target', 'Upside %',
-                'Rating', 'Analysts', 'Score', 'Signal', 'Market Cap', 'Sector'
-            ]
-            
-            # Format columns
-            display_df['Price'] = display_df['Price'].apply(lambda x: f"${x:.2f}" if pd.notna(x) else "—")
-            display_df['Target'] = display_df['Target'].apply(lambda x: f"${x:.2f}" if pd.notna(x) else "—")
-            display_df['Upside %'] = display_df['Upside %'].apply(lambda x: f"{x:+.1f}%" if pd.notna(x) else "—")
-            display_df['Market Cap'] = display_df['Market Cap'].apply(format_market_cap)
-            display_df['Score'] = display_df['Score'].apply(lambda x: f"{x:.1f}")
-            
-            # Display as interactive table
-            st.dataframe(
-                display_df,
-                use_container_width=True,
-                hide_index=True,
-                column_config={
-                    "Ticker": st.column_config.TextColumn("Ticker", width="small"),
-                    "Company": st.column_config.TextColumn("Company", width="medium"),
-                    "Price": st.column_config.TextColumn("Price", width="small"),
-                    "Target": st.column_config.TextColumn("Target", width="small"),
-                    "Upside %": st.column_config.TextColumn("Upside %", width="small"),
-                    "Rating": st.column_config.TextColumn("Rating", width="small"),
-                    "Analysts": st.column_config.NumberColumn("Analysts", width="small"),
-                    "Score": st.column_config.TextColumn("Score", width="small"),
-                    "Signal": st.column_config.TextColumn("Signal", width="medium"),
-                    "Market Cap": st.column_config.TextColumn("Mkt Cap", width="small"),
-                    "Sector": st.column_config.TextColumn("Sector", width="medium"),
-                }
+
+screen = st.session_state.get('screen')
+
+if screen is not None:
+    results = screen['results']
+    
+    # Display summary metrics
+    st.markdown("---")
+    st.markdown("### 📊 Screening Results")
+    
+    metric_cols = st.columns(4)
+    with metric_cols[0]:
+        st.metric("Stocks Screened", screen['screened'])
+    with metric_cols[1]:
+        st.metric("Passed Filters", screen['passed'])
+    with metric_cols[2]:
+        avg_upside = results['upside_pct'].mean()
+        st.metric("Avg Upside", f"{avg_upside:.1f}%" if pd.notna(avg_upside) else "—")
+    with metric_cols[3]:
+        avg_score = results['score'].mean()
+        st.metric("Avg Score", f"{avg_score:.1f}")
+    
+    if not screen['changes'].empty:
+        with st.expander(f"🔄 {len(screen['changes'])} changes since last fetch"):
+            st.dataframe(screen['changes'], use_container_width=True, hide_index=True)
+    
+    for name, error in screen['broken'].items():
+        st.warning(f"⚠️ Saved screen '{name}' couldn't be checked: {error}")
+    
+    if not screen['alerts'].empty:
+        with st.expander(f"🔔 {len(screen['alerts'])} saved-screen alerts"):
+            st.dataframe(screen['alerts'], use_container_width=True, hide_index=True)
+    
+    # Look through the ETFs the user already holds (needs cached holdings files)
+    held_etfs = available_etfs()
+    if held_etfs:
+        with st.expander("🧺 ETFs you already hold"):
+            chosen_etfs = st.multiselect(
+                "Flag candidates you already own through these ETFs:",
+                options=held_etfs,
+                help="Holdings come from the CSV files in ~/.investscout/holdings (one per fund, e.g. VFV.TO.csv)",
             )
+            if chosen_etfs:
+                amounts = {
+                    etf: st.number_input(f"Amount in {etf}", min_value=0.0, value=1000.0, step=500.0, key=f"etf_{etf}")
+                    for etf in chosen_etfs
+                }
+                holdings = load_holdings(chosen_etfs)
+                results = flag_overlap(results, amounts, holdings)
+                lookthrough = etf_lookthrough(screen['universe'], screen['style'].lower(), holdings, screen['factors'])
+                st.dataframe(
+                    lookthrough.reset_index(),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "etf": st.column_config.TextColumn("ETF"),
+                        "holdings": st.column_config.NumberColumn("Holdings"),
+                        "coverage": st.column_config.ProgressColumn("Weight Screened", min_value=0.0, max_value=1.0, format="%.2f"),
+                        "weighted_upside": st.column_config.NumberColumn("Weighted Upside %", format="%+.1f%%"),
+                        "weighted_score": st.column_config.NumberColumn("Weighted Score", format="%.1f"),
+                    },
+                )
+                st.caption(f"{int(results['overlap'].sum())} of {len(results)} candidates are already held through these ETFs.")
+    
+    st.markdown("---")
+    st.markdown(f"### 🏆 Top {len(results)} Candidates ({screen['style']} Strategy)")
+    
+    # Only one page of rows is sent to the browser per rerun
+    pages = max((len(results) - 1) // PAGE_SIZE + 1, 1)
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages}, {PAGE_SIZE} rows each)", min_value=1, max_value=pages, value=1)
+    else:
+        page = 1
+    page_rows = results.iloc[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+    
+    # Numbers stay numeric; formatting is done by column_config in the browser
+    display_df = pd.DataFrame({
+        'Ticker': page_rows['ticker'],
+        'Company': page_rows['name'],
+        'Price': page_rows['price'],
+        'Target': page_rows['target_price'],
+        'Upside %': page_rows['upside_pct'],
+        'Rating': page_rows['recommendation'],
+        'Analysts': page_rows['num_analysts'],
+        'Score': page_rows['score'],
+        'Signal': page_rows['signal'],
+        'Market Cap': page_rows.get('market_cap_usd', page_rows['market_cap']) / 1e9,
+        'Sector': page_rows['sector'],
+    })
+    if 'etf_exposure' in page_rows:
+        display_df['Via ETFs'] = page_rows['etf_exposure'] * 100
+    
+    # Display as interactive table
+    st.dataframe(
+        display_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Ticker": st.column_config.TextColumn("Ticker", width="small"),
+            "Company": st.column_config.TextColumn("Company", width="medium"),
+            "Price": st.column_config.NumberColumn("Price", width="small", format="$%.2f"),
+            "Target": st.column_config.NumberColumn("Target", width="small", format="$%.2f"),
+            "Upside %": st.column_config.NumberColumn("Upside %", width="small", format="%+.1f%%"),
+            "Rating": st.column_config.TextColumn("Rating", width="small"),
+            "Analysts": st.column_config.NumberColumn("Analysts", width="small"),
+            "Score": st.column_config.NumberColumn("Score", width="small", format="%.1f"),
+            "Signal": st.column_config.TextColumn("Signal", width="medium"),
+            "Market Cap": st.column_config.NumberColumn("Mkt Cap (USD)", width="small", format="$%.1fB"),
+            "Sector": st.column_config.TextColumn("Sector", width="medium"),
+            "Via ETFs": st.column_config.NumberColumn("Via ETFs", width="small", format="%.2f%%",
+                                                      help="Share of your ETF holdings already in this stock"),
+        }
+    )
+    
+    # Expandable details for each stock
+    st.markdown("---")
+    st.markdown("### 📋 Detailed View")
+    st.markdown("Click on a stock below to see more details:")
+    
+    for idx, row in page_rows.head(10).iterrows():
+        with st.expander(f"**{row['ticker']}** - {row['name']} (Score: {row['score']:.1f})"):
+            detail_cols = st.columns(3)
             
-            # Expandable details for each stock
-            st.markdown("---")
-            st.markdown("### 📋 Detailed View")
-            st.markdown("Click on a stock below to see more details:")
+            with detail_cols[0]:
+                st.markdown("**Valuation**")
+                st.write(f"• Current Price: ${row['price']:.2f}")
+                if pd.notna(row['target_price']):
+                    st.write(f"• Target Price: ${row['target_price']:.2f}")
+                    st.write(f"• Upside: {row['upside_pct']:+.1f}%")
+                if pd.notna(row['pe_ratio']):
+                    st.write(f"• P/E Ratio: {row['pe_ratio']:.1f}")
             
-            for idx, row in results.head(10).iterrows():
-                with st.expander(f"**{row['ticker']}** - {row['name']} (Score: {row['score']:.1f})"):
-                    detail_cols = st.columns(3)
-                    
-                    with detail_cols[0]:
-                        st.markdown("**Valuation**")
-                        st.write(f"• Current Price: ${row['price']:.2f}")
-                        if pd.notna(row['target_price']):
-                            st.write(f"• Target Price: ${row['target_price']:.2f}")
-                            st.write(f"• Upside: {row['upside_pct']:+.1f}%")
-                        if pd.notna(row['pe_ratio']):
-                            st.write(f"• P/E Ratio: {row['pe_ratio']:.1f}")
-                    
-                    with detail_cols[1]:
-                        st.markdown("**Analyst Coverage**")
-                        st.write(f"• Recommendation: {row['recommendation'].title()}")
-                        st.write(f"• Number of Analysts: {row['num_analysts']}")
-                        if pd.notna(row['recommendation_mean']):
-                            st.write(f"• Rating Score: {row['recommendation_mean']:.1f}/5")
-                    
-                    with detail_cols[2]:
-                        st.markdown("**Growth & Dividends**")
-                        if pd.notna(row['revenue_growth']):
-                            st.write(f"• Revenue Growth: {row['revenue_growth']*100:.1f}%")
-                        if pd.notna(row['earnings_growth']):
-                            st.write(f"• Earnings Growth: {row['earnings_growth']*100:.1f}%")
-                        if row['dividend_yield'] > 0:
-                            st.write(f"• Dividend Yield: {row['dividend_yield']*100:.2f}%")
+            with detail_cols[1]:
+                st.markdown("**Analyst Coverage**")
+                st.write(f"• Recommendation: {row['recommendation'].title()}")
+                st.write(f"• Number of Analysts: {row['num_analysts']}")
+                if pd.notna(row['recommendation_mean']):
+                    st.write(f"• Rating Score: {row['recommendation_mean']:.1f}/5")
             
-            # Download option
-            st.markdown("---")
-            csv = results.to_csv(index=False)
+            with detail_cols[2]:
+                st.markdown("**Growth & Dividends**")
+                if pd.notna(row['revenue_growth']):
+                    st.write(f"• Revenue Growth: {row['revenue_growth']*100:.1f}%")
+                if pd.notna(row['earnings_growth']):
+                    st.write(f"• Earnings Growth: {row['earnings_growth']*100:.1f}%")
+                if row['dividend_yield'] > 0:
+                    st.write(f"• Dividend Yield: {row['dividend_yield']*100:.2f}%")
+                if pd.notna(row.get('revenue_cagr')):
+                    st.write(f"• Revenue CAGR ({row['revenue_cagr_years']:.0f}y): {row['revenue_cagr']*100:.1f}%")
+                if pd.notna(row.get('fcf_payout_ratio')):
+                    st.write(f"• FCF Payout: {row['fcf_payout_ratio']*100:.0f}%")
+                if row.get('dividend_growth_streak', 0) > 0:
+                    st.write(f"• Dividend Raises: {row['dividend_growth_streak']:.0f} years in a row")
+    
+    # Download option (the CSV is only built when asked for)
+    st.markdown("---")
+    if 'results_csv' not in st.session_state:
+        if st.button("📥 Prepare CSV Download"):
+            st.session_state['results_csv'] = results.to_csv(index=False)
+    if 'results_csv' in st.session_state:
+        st.download_button(
+            label="📥 Download Full Results (CSV)",
+            data=st.session_state['results_csv'],
+            file_name="rrsp_screener_results.csv",
+            mime="text/csv",
+        )
+    
+    with st.expander("📦 Export every stock that passed the filters"):
+        export_cols = st.columns(2)
+        with export_cols[0]:
+            export_format = st.selectbox("Format", options=["csv", "parquet", "jsonl"])
+        with export_cols[1]:
+            export_all_fields = st.checkbox("Include every fetched field", value=False)
+        export_options = (export_format, export_all_fields)
+        if st.button("📦 Prepare Export"):
+            # Serialized chunk by chunk into one buffer for the download; nothing is written on the server
+            buffer = io.BytesIO()
+            try:
+                for data in iter_export(
+                    screen['universe'], export_format, screen['criteria'], screen['style'].lower(),
+                    export_all_fields, factors=screen['factors'], one_per_issuer=screen['one_per_issuer'],
+                ):
+                    buffer.write(data)
+                st.session_state['export_file'] = (export_options, buffer.getvalue())
+            except ImportError as e:
+                st.error(str(e))
+        export_file = st.session_state.get('export_file')
+        if export_file is not None and export_file[0] == export_options:
             st.download_button(
-                label="📥 Download Full Results (CSV)",
-                data=csv,
-                file_name="rrsp_screener_results.csv",
-                mime="text/csv",
+                label=f"📥 Download Export ({export_format.upper()})",
+                data=export_file[1],
+                file_name=f"investscout_screen.{export_format}",
+                mime=EXPORT_FORMATS[export_format],
             )
 
-else:
+elif not screen_button:
     # Show instructions when app first loads
     st.info("""
     👈 **Configure your screening criteria in the sidebar, then click "Find Candidates"**
@@ -461,6 +764,10 @@ with st.expander("🎯 Scoring & Ranking Algorithm", expanded=False):
     - **Value (P/E)**: Lower P/E = higher score (P/E of 10 = 100 points)
     
     The final score is a weighted average of these factors based on your style.
+    
+    With **Score factors against: Sector/Industry peers**, each factor is instead scored
+    0-100 by how the stock compares with its peers (percentile or z-score), so a utility's
+    yield and a software company's P/E are judged within their own groups.
     """)
 
 with st.expander("⚠️ Limitations & Disclaimers", expanded=False):
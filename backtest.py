@@ -0,0 +1,223 @@
+"""
+Backtest Module
+Replays historical snapshots through the style scoring rules and measures
+forward returns of each style's top-N basket, vectorized across tickers
+and dates.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from screener import STYLE_WEIGHTS, factor_scores, filter_mask
+from snapshots import DEFAULT_UNIVERSE, list_snapshots, load_snapshot
+
+
+def load_history(path: Optional[Path] = None, universe: str = DEFAULT_UNIVERSE) -> pd.DataFrame:
+    """
+    Load historical snapshots as one long frame with a 'date' column.
+
+    Args:
+        path: None to read the local snapshot store; a file (CSV or pickle)
+            with a 'date' column; or a directory of per-date fixture files,
+            dated by their 'date' column or, failing that, their file name
+        universe: Universe whose stored snapshots are read (when path is None)
+
+    Returns:
+        DataFrame with one row per (date, ticker)
+    """
+    if path is None:
+        frames = [
+            load_snapshot(version, universe=universe).assign(date=pd.to_datetime(int(version), unit='ms'))
+            for version in list_snapshots(universe=universe)
+        ]
+    else:
+        path = Path(path)
+        files = sorted(path.iterdir()) if path.is_dir() else [path]
+        frames = []
+        for file in files:
+            if file.suffix == '.csv':
+                frame = pd.read_csv(file)
+            elif file.suffix == '.pkl':
+                frame = pd.read_pickle(file)
+            else:
+                continue
+            if 'date' not in frame:
+                frame['date'] = file.stem
+            frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=['date', 'ticker'])
+
+    history = pd.concat(frames, ignore_index=True)
+    history['date'] = pd.to_datetime(history['date'])
+    return history
+
+
+def _grid(history: pd.DataFrame, values, dates: pd.Index, tickers: pd.Index, fill=np.nan) -> np.ndarray:
+    """Scatter a long column into a dates x tickers matrix."""
+    values = np.asarray(values)
+    dtype = bool if values.dtype == bool else 'float64'
+    grid = np.full((len(dates), len(tickers)), fill, dtype=dtype)
+    grid[dates.get_indexer(history['date']), tickers.get_indexer(history['ticker'])] = values
+    return grid
+
+
+def build_panels(
+    history: pd.DataFrame,
+    rebalance_every: int = 1,
+    criteria: Optional[Dict] = None,
+) -> Optional[Dict]:
+    """
+    Reshape a long history into the matrices a backtest works on.
+
+    Args:
+        history: Long frame from load_history
+        rebalance_every: Rebalance every this many snapshot dates
+        criteria: Optional filter criteria applied at each rebalance
+
+    Returns:
+        Dict with 'dates' (rebalance dates), 'tickers', 'forward'
+        (periods x tickers forward returns), 'held' (periods x tickers
+        eligibility) and 'factors' (periods x tickers x factors sub-scores,
+        in 'factor_names' order); None if there are fewer than two
+        rebalance dates
+    """
+    history = history.drop_duplicates(['date', 'ticker'], keep='last')
+    if 'upside_pct' not in history and 'target_price' in history:
+        history = history.assign(upside_pct=(history['target_price'] - history['price']) / history['price'] * 100)
+
+    dates = pd.Index(sorted(history['date'].unique()))
+    tickers = pd.Index(history['ticker'].unique())
+    rebalance = np.arange(0, len(dates), rebalance_every)
+    if len(rebalance) < 2:
+        return None
+
+    prices = _grid(history, pd.to_numeric(history['price'], errors='coerce').to_numpy(dtype='float64'), dates, tickers)
+    eligible = np.isfinite(prices) & (prices > 0)
+    if criteria:
+        eligible &= _grid(history, filter_mask(history, criteria).to_numpy(), dates, tickers, fill=False)
+
+    # Forward return of every ticker over each holding period
+    start, end = rebalance[:-1], rebalance[1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        forward = prices[end] / prices[start] - 1
+
+    factors = factor_scores(history)
+    panel = np.stack(
+        [_grid(history, factors[name].to_numpy(), dates, tickers, fill=0.0)[start] for name in factors.columns],
+        axis=-1,
+    )
+
+    return {
+        'dates': dates[start],
+        'tickers': tickers,
+        'forward': forward,
+        'held': eligible[start],
+        'factors': panel,
+        'factor_names': list(factors.columns),
+    }
+
+
+def run_backtest(
+    history: pd.DataFrame,
+    styles: Optional[List[str]] = None,
+    top_n: int = 20,
+    rebalance_every: int = 1,
+    criteria: Optional[Dict] = None,
+    weights: Optional[Dict[str, Dict[str, float]]] = None,
+) -> pd.DataFrame:
+    """
+    Backtest each style's equal-weighted top-N basket.
+
+    At every rebalance date the snapshot is filtered and scored with the
+    same rules as rank_candidates, and the basket is held until the next
+    rebalance date.
+
+    Args:
+        history: Long frame from load_history (needs date, ticker, price
+            and the scoring inputs)
+        styles: Styles to test (defaults to all of STYLE_WEIGHTS)
+        top_n: Basket size
+        rebalance_every: Rebalance every this many snapshot dates
+        criteria: Optional filter criteria applied at each rebalance
+        weights: Style weight sets to use instead of STYLE_WEIGHTS
+
+    Returns:
+        DataFrame indexed by rebalance date with one column of forward
+        period returns per style, plus 'benchmark' (equal-weighted
+        eligible universe) and '<style>_turnover' columns
+    """
+    weights = weights or STYLE_WEIGHTS
+    styles = [s.lower() for s in (styles or list(weights))]
+
+    panels = build_panels(history, rebalance_every, criteria)
+    if panels is None:
+        return pd.DataFrame()
+    forward, held = panels['forward'], panels['held']
+
+    result = pd.DataFrame(index=panels['dates'])
+    result.index.name = 'date'
+    result['benchmark'] = masked_mean(forward, held)
+
+    for style in styles:
+        w = weights.get(style, STYLE_WEIGHTS['blend'])
+        scores = (panels['factors'] @ pd.Series(w)[panels['factor_names']].to_numpy()).round(2)
+        scores = np.where(held, scores, -np.inf)
+
+        basket = _top_n_mask(scores, top_n)
+        result[style] = masked_mean(forward, basket)
+        overlap = (basket[1:] & basket[:-1]).sum(axis=1) / np.maximum(basket[1:].sum(axis=1), 1)
+        result[f'{style}_turnover'] = np.concatenate([[1.0], 1 - overlap])
+
+    return result
+
+
+def _top_n_mask(scores: np.ndarray, top_n: int) -> np.ndarray:
+    """Boolean matrix marking each row's top_n finite scores."""
+    k = min(top_n, scores.shape[1])
+    picks = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    mask = np.zeros(scores.shape, dtype=bool)
+    np.put_along_axis(mask, picks, True, axis=1)
+    return mask & np.isfinite(scores)
+
+
+def masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Row means of values where mask is set and values are finite."""
+    use = mask & np.isfinite(values)
+    counts = use.sum(axis=1)
+    totals = np.where(use, values, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+
+def summarize_backtest(result: pd.DataFrame, periods_per_year: float = 52) -> pd.DataFrame:
+    """
+    Summary statistics for a run_backtest result.
+
+    Args:
+        result: Output of run_backtest
+        periods_per_year: Holding periods per year (52 for weekly rebalances)
+
+    Returns:
+        DataFrame with one row per style (and the benchmark): total return,
+        CAGR, annualized volatility, Sharpe (zero risk-free rate), hit rate
+        against the benchmark and average turnover
+    """
+    rows = {}
+    for column in [c for c in result.columns if not c.endswith('_turnover')]:
+        returns = result[column].fillna(0.0)
+        growth = (1 + returns).prod()
+        years = len(returns) / periods_per_year
+        vol = returns.std() * np.sqrt(periods_per_year)
+        rows[column] = {
+            'total_return': growth - 1,
+            'cagr': growth ** (1 / years) - 1 if years > 0 and growth > 0 else np.nan,
+            'volatility': vol,
+            'sharpe': returns.mean() * periods_per_year / vol if vol > 0 else np.nan,
+            'hit_rate': (result[column] > result['benchmark']).mean() if column != 'benchmark' else np.nan,
+            'avg_turnover': result[f'{column}_turnover'].mean() if f'{column}_turnover' in result else np.nan,
+        }
+    return pd.DataFrame(rows).T
@@ -0,0 +1,13 @@
+# Fallback FX rates (USD per unit of currency) for offline use
+# Used only when live rates can't be fetched and nothing is cached yet
+
+FALLBACK_USD_RATES = {
+    "USD": 1.0,
+    "CAD": 0.73,
+    "EUR": 1.08,
+    "GBP": 1.27,
+    "CHF": 1.13,
+    "JPY": 0.0067,
+    "AUD": 0.66,
+    "HKD": 0.128,
+}
@@ -0,0 +1,58 @@
+# Issuers with more than one listing (share classes and TSX/US cross-listings)
+# Listings are ordered most liquid first; the first one is the issuer's primary
+# listing, whose .info payload supplies the shared fundamentals and analyst data
+# Matching symbols are NOT enough: T.TO (Telus) is not T (AT&T) and WELL.TO
+# (WELL Health) is not WELL (Welltower), so pairs are listed explicitly
+
+ISSUER_LISTINGS = {
+    # US share classes
+    "Alphabet": ["GOOGL", "GOOG"],
+    "Fox Corp": ["FOXA", "FOX"],
+    "News Corp": ["NWSA", "NWS"],
+    "Berkshire Hathaway": ["BRK.B", "BRK.A"],
+
+    # TSX names also listed in New York
+    "Royal Bank": ["RY.TO", "RY"],
+    "TD Bank": ["TD.TO", "TD"],
+    "Bank of Nova Scotia": ["BNS.TO", "BNS"],
+    "Bank of Montreal": ["BMO.TO", "BMO"],
+    "CIBC": ["CM.TO", "CM"],
+    "Enbridge": ["ENB.TO", "ENB"],
+    "Canadian National Railway": ["CNR.TO", "CNI"],
+    "Canadian Pacific Kansas City": ["CP.TO", "CP"],
+    "TC Energy": ["TRP.TO", "TRP"],
+    "BCE Inc": ["BCE.TO", "BCE"],
+    "Telus": ["T.TO", "TU"],
+    "Suncor Energy": ["SU.TO", "SU"],
+    "Canadian Natural Resources": ["CNQ.TO", "CNQ"],
+    "Cenovus Energy": ["CVE.TO", "CVE"],
+    "Imperial Oil": ["IMO.TO", "IMO"],
+    "Barrick Gold": ["ABX.TO", "B"],
+    "Nutrien": ["NTR.TO", "NTR"],
+    "Fortis": ["FTS.TO", "FTS"],
+    "Thomson Reuters": ["TRI.TO", "TRI"],
+    "Shopify": ["SHOP", "SHOP.TO"],
+    "Restaurant Brands": ["QSR", "QSR.TO"],
+    "Manulife": ["MFC.TO", "MFC"],
+    "Sun Life": ["SLF.TO", "SLF"],
+    "Waste Connections": ["WCN", "WCN.TO"],
+    "Rogers Communications": ["RCI-B.TO", "RCI"],
+    "Pembina Pipeline": ["PPL.TO", "PBA"],
+    "Cameco": ["CCO.TO", "CCJ"],
+    "Teck Resources": ["TECK-B.TO", "TECK"],
+    "Wheaton Precious Metals": ["WPM.TO", "WPM"],
+    "Agnico Eagle": ["AEM.TO", "AEM"],
+    "Kinross Gold": ["K.TO", "KGC"],
+    "Magna International": ["MG.TO", "MGA"],
+    "CAE Inc": ["CAE.TO", "CAE"],
+    "Stantec": ["STN.TO", "STN"],
+    "TFI International": ["TFII.TO", "TFII"],
+    "CGI Group": ["GIB-A.TO", "GIB"],
+    "Open Text": ["OTEX.TO", "OTEX"],
+    "BlackBerry": ["BB.TO", "BB"],
+    "Lightspeed": ["LSPD.TO", "LSPD"],
+    "Brookfield Asset Management": ["BAM.TO", "BAM"],
+    "Brookfield Corporation": ["BN.TO", "BN"],
+    "Brookfield Infrastructure Partners": ["BIP-UN.TO", "BIP"],
+    "Brookfield Renewable Partners": ["BEP-UN.TO", "BEP"],
+}
@@ -0,0 +1,10 @@
+# Ticker universes screened as a unit; snapshots, diffs and watchlist state
+# are kept per universe key so switching markets doesn't mix them
+from data.sp500 import SP500_TICKERS
+from data.tsx60 import TSX_TICKERS
+
+UNIVERSES = {
+    'all': SP500_TICKERS + TSX_TICKERS,
+    'us': SP500_TICKERS,
+    'tsx': TSX_TICKERS,
+}
@@ -0,0 +1,211 @@
+"""
+Diversification Module
+Daily-returns correlation over the candidate list, and a correlation-aware
+top-N that skips names too similar to ones already picked.
+"""
+
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from http_session import get_session
+from refresh import last_market_close
+from snapshots import DATA_DIR
+
+PRICE_CACHE_PATH = DATA_DIR / 'prices.pkl'
+
+# Days of history kept per ticker (about one trading year)
+HISTORY_DAYS = 365
+
+_lock = threading.Lock()
+_correlation_cache: Dict[tuple, pd.DataFrame] = {}
+
+
+def _read_cache(path: Path) -> Dict:
+    if not path.exists():
+        return {'prices': pd.DataFrame(), 'fetched': {}}
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _write_cache(cache: Dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(cache, f)
+    tmp.replace(path)
+
+
+def _download_closes(tickers: List[str], start: pd.Timestamp) -> pd.DataFrame:
+    """Adjusted daily closes (dates x tickers) from start to today."""
+    try:
+        data = yf.download(
+            tickers, start=start.strftime('%Y-%m-%d'), progress=False,
+            auto_adjust=True, threads=True, session=get_session(),
+        )
+    except Exception:
+        return pd.DataFrame()
+    if data is None or data.empty or 'Close' not in data:
+        return pd.DataFrame()
+    return data['Close']
+
+
+def load_price_history(tickers: List[str], path: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Daily closes for the given tickers, served from the local cache.
+
+    Only tickers with no cached history, or not refreshed since the last
+    market close, are downloaded; stale tickers are topped up from their
+    last cached date rather than re-fetched in full.
+
+    Args:
+        tickers: Tickers to return
+        path: Cache file (defaults to ~/.investscout/prices.pkl)
+
+    Returns:
+        DataFrame of closes, dates x tickers (tickers without data omitted)
+    """
+    path = Path(path or PRICE_CACHE_PATH)
+    with _lock:
+        cache = _read_cache(path)
+    prices, fetched = cache['prices'], cache['fetched']
+    cutoff = last_market_close()
+    today = pd.Timestamp.now().normalize()
+
+    missing = [t for t in tickers if t not in fetched]
+    stale = [t for t in tickers if t in fetched and fetched[t] < cutoff]
+
+    if missing or stale:
+        # Download without holding the lock, so other sessions' cache hits
+        # aren't stuck behind this fetch
+        updates = []
+        if missing:
+            updates.append(_download_closes(missing, today - pd.Timedelta(days=HISTORY_DAYS)))
+        if stale:
+            cached = prices.reindex(columns=stale)
+            lasts = [cached[t].last_valid_index() for t in stale]
+            if all(last is not None for last in lasts):
+                start = min(lasts) - pd.Timedelta(days=5)
+            else:
+                start = today - pd.Timedelta(days=HISTORY_DAYS)
+            updates.append(_download_closes(stale, start))
+
+        with _lock:
+            # Merge into the cache as it is now, which another call may have updated meanwhile
+            cache = _read_cache(path)
+            prices, fetched = cache['prices'], cache['fetched']
+            for update in updates:
+                if not update.empty:
+                    # Newly downloaded values win over cached ones
+                    prices = update.combine_first(prices) if not prices.empty else update
+            prices = prices[prices.index >= today - pd.Timedelta(days=HISTORY_DAYS)]
+            now = time.time()
+            fetched.update({t: now for t in missing + stale})
+            _write_cache({'prices': prices, 'fetched': fetched}, path)
+
+    available = [t for t in tickers if t in prices.columns]
+    return prices[available].sort_index()
+
+
+def returns_matrix(prices: pd.DataFrame) -> pd.DataFrame:
+    """Daily simple returns (dates x tickers); gaps stay NaN."""
+    return prices.pct_change(fill_method=None).iloc[1:]
+
+
+def correlation_matrix(returns: pd.DataFrame, min_periods: int = 60) -> pd.DataFrame:
+    """
+    Pairwise correlation of daily returns from a few matrix products.
+
+    Means and variances are taken per pair over the days both tickers have
+    returns (as pandas' DataFrame.corr does), so a ticker with a short or
+    gappy history is compared with each other ticker on their shared days
+    only. Pairs overlapping on fewer than min_periods days are NaN.
+
+    Args:
+        returns: Daily returns (dates x tickers)
+        min_periods: Minimum overlapping days for a correlation
+
+    Returns:
+        Square DataFrame of correlations (tickers x tickers)
+    """
+    key = (tuple(returns.columns), returns.index.max() if len(returns) else None, len(returns), min_periods)
+    with _lock:
+        cached = _correlation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    values = returns.to_numpy(dtype='float64')
+    present = np.isfinite(values).astype('float64')
+    # Centering on each column's mean doesn't change the correlations but
+    # keeps the sums below well conditioned
+    with np.errstate(invalid='ignore'):
+        x = np.nan_to_num(values - np.nanmean(values, axis=0))
+
+    # Entry [i, j] sums over the days both i and j are present
+    overlap = present.T @ present
+    sum_x = x.T @ present
+    sum_xx = (x * x).T @ present
+    sum_xy = x.T @ x
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_x.T / overlap
+        var = sum_xx - sum_x ** 2 / overlap
+        corr = cov / np.sqrt(var * var.T)
+    corr = np.clip(corr, -1.0, 1.0)
+    corr[overlap < min_periods] = np.nan
+    np.fill_diagonal(corr, 1.0)
+
+    result = pd.DataFrame(corr, index=returns.columns, columns=returns.columns)
+    with _lock:
+        # Only the latest few matrices are worth keeping
+        if len(_correlation_cache) >= 8:
+            _correlation_cache.pop(next(iter(_correlation_cache)))
+        _correlation_cache[key] = result
+    return result
+
+
+def diversified_top_n(ranked: pd.DataFrame, corr: pd.DataFrame, top_n: int = 20,
+                      max_corr: float = 0.8) -> pd.DataFrame:
+    """
+    Walk candidates best-first, skipping any too correlated with a pick.
+
+    Args:
+        ranked: Candidates sorted best first (e.g. rank_candidates output
+            with a large top_n)
+        corr: Correlation matrix from correlation_matrix
+        top_n: Number of candidates to return
+        max_corr: Highest correlation allowed with an already chosen name
+
+    Returns:
+        The chosen rows, in rank order, with a 'max_corr' column holding
+        each pick's highest correlation with the picks above it. Tickers
+        without price history are never skipped.
+    """
+    if ranked.empty:
+        return ranked
+
+    tickers = ranked['ticker'].to_numpy()
+    matrix = corr.reindex(index=tickers, columns=tickers).to_numpy(dtype='float64')
+    matrix = np.nan_to_num(matrix, nan=0.0)
+
+    # Highest correlation of every candidate with anything picked so far
+    worst = np.full(len(tickers), -np.inf)
+    chosen = []
+    chosen_worst = []
+    for i in range(len(tickers)):
+        if worst[i] > max_corr:
+            continue
+        chosen.append(i)
+        chosen_worst.append(worst[i] if np.isfinite(worst[i]) else np.nan)
+        if len(chosen) == top_n:
+            break
+        np.maximum(worst, matrix[i], out=worst)
+
+    picks = ranked.iloc[chosen].copy()
+    picks['max_corr'] = chosen_worst
+    return picks
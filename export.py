@@ -0,0 +1,251 @@
+"""
+Export Module
+Writes the whole filtered and scored universe (not just the top N) to CSV,
+Parquet or JSON Lines in fixed-size chunks, so memory stays bounded no
+matter how many rows are exported.
+"""
+
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from issuers import one_listing_per_issuer
+from screener import calculate_scores, filter_mask
+from snapshots import DATA_DIR
+
+EXPORT_DIR = DATA_DIR / 'exports'
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet', 'jsonl': 'application/x-ndjson'}
+
+# Columns exported unless every fetched field is asked for
+EXPORT_COLUMNS = [
+    'rank', 'ticker', 'name', 'price', 'target_price', 'upside_pct', 'score',
+    'recommendation', 'recommendation_mean', 'num_analysts', 'pe_ratio',
+    'dividend_yield', 'revenue_growth', 'earnings_growth', 'market_cap',
+    'currency', 'market_cap_usd', 'pct_from_high', 'sector', 'industry',
+]
+
+# Rows serialized at a time
+EXPORT_CHUNK_ROWS = 10_000
+
+
+def _ranked_order(df: pd.DataFrame, criteria: Optional[Dict], style: str, factors: Optional[pd.DataFrame],
+                  one_per_issuer: Optional[str] = None):
+    """Positions of passing rows, best score first, and their scores."""
+    mask = filter_mask(df, criteria).to_numpy() if criteria else np.ones(len(df), dtype=bool)
+    positions = np.flatnonzero(mask)
+    if one_per_issuer:
+        positions = positions[one_listing_per_issuer(df.iloc[positions], one_per_issuer).to_numpy()]
+    scores = calculate_scores(df.iloc[positions], style, factors).to_numpy()
+    order = np.argsort(-scores, kind='stable')
+    return positions[order], scores[order]
+
+
+def _export_columns(df: pd.DataFrame, all_fields: bool) -> List[str]:
+    if all_fields:
+        return ['rank'] + [c for c in df.columns if c not in ('rank', 'score')] + ['score']
+    return [c for c in EXPORT_COLUMNS if c in df.columns or c in ('rank', 'score')]
+
+
+def iter_ranked_chunks(
+    df: pd.DataFrame,
+    criteria: Optional[Dict] = None,
+    style: str = 'blend',
+    all_fields: bool = False,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+    factors: Optional[pd.DataFrame] = None,
+    one_per_issuer: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the filtered universe in rank order, chunk_rows rows at a time.
+
+    Args:
+        df: Snapshot (tickers x screener columns)
+        criteria: Filter criteria (None exports every row)
+        style: Investing style used for the score and rank columns
+        all_fields: Include every column of df rather than EXPORT_COLUMNS
+        chunk_rows: Rows per chunk
+        factors: Precomputed factor scores (e.g. peer-relative) to score with
+        one_per_issuer: Keep one listing per issuer ('liquid' or 'cad', as
+            for rank_candidates); None exports every listing
+
+    Returns:
+        Iterator of DataFrames with 'rank' and 'score' columns added
+    """
+    positions, scores = _ranked_order(df, criteria, style, factors, one_per_issuer)
+    columns = _export_columns(df, all_fields)
+    source = [c for c in columns if c not in ('rank', 'score')]
+
+    for start in range(0, len(positions), chunk_rows):
+        stop = start + chunk_rows
+        chunk = df.iloc[positions[start:stop]][source].reset_index(drop=True)
+        chunk['rank'] = np.arange(start + 1, start + len(chunk) + 1)
+        chunk['score'] = scores[start:stop]
+        yield chunk[columns]
+
+
+def _parquet_schema(df: pd.DataFrame, columns: List[str]):
+    import pyarrow as pa
+
+    fields = []
+    for column in columns:
+        if column == 'rank':
+            fields.append(pa.field(column, pa.int64()))
+        elif column == 'score':
+            fields.append(pa.field(column, pa.float64()))
+        elif pd.api.types.is_bool_dtype(df[column]):
+            fields.append(pa.field(column, pa.bool_()))
+        elif pd.api.types.is_numeric_dtype(df[column]):
+            # Floats throughout so a chunk of whole numbers can't change the type
+            fields.append(pa.field(column, pa.float64()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+class _Drain:
+    """File-like sink whose written bytes are collected and handed out in pieces."""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def iter_export(
+    df: pd.DataFrame,
+    fmt: str = 'csv',
+    criteria: Optional[Dict] = None,
+    style: str = 'blend',
+    all_fields: bool = False,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+    factors: Optional[pd.DataFrame] = None,
+    one_per_issuer: Optional[str] = None,
+) -> Iterator[bytes]:
+    """
+    Serialize the ranked universe as a stream of byte chunks.
+
+    Concatenating the chunks gives a complete file; nothing larger than one
+    chunk is held in memory, so it can be written straight to disk or to an
+    HTTP response.
+
+    Args:
+        df: Snapshot (tickers x screener columns)
+        fmt: 'csv', 'parquet' (needs pyarrow) or 'jsonl'
+        criteria: Filter criteria (None exports every row)
+        style: Investing style used for the score and rank columns
+        all_fields: Include every column of df rather than EXPORT_COLUMNS
+        chunk_rows: Rows serialized at a time (one Parquet row group each)
+        factors: Precomputed factor scores (e.g. peer-relative) to score with
+        one_per_issuer: Keep one listing per issuer ('liquid' or 'cad', as
+            for rank_candidates); None exports every listing
+
+    Returns:
+        Iterator of bytes
+    """
+    fmt = fmt.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {sorted(EXPORT_FORMATS)}")
+    chunks = iter_ranked_chunks(df, criteria, style, all_fields, chunk_rows, factors, one_per_issuer)
+
+    if fmt == 'csv':
+        header = True
+        for chunk in chunks:
+            yield chunk.to_csv(index=False, header=header).encode()
+            header = False
+        if header:
+            # No rows passed; still a valid file
+            yield (','.join(_export_columns(df, all_fields)) + '\n').encode()
+
+    elif fmt == 'jsonl':
+        for chunk in chunks:
+            yield chunk.to_json(orient='records', lines=True).encode()
+
+    else:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow)") from e
+
+        columns = _export_columns(df, all_fields)
+        schema = _parquet_schema(df, columns)
+        sink = _Drain()
+        with pq.ParquetWriter(sink, schema) as writer:
+            for chunk in chunks:
+                for field in schema:
+                    if pa.types.is_string(field.type):
+                        values = chunk[field.name]
+                        chunk[field.name] = values.where(values.isna(), values.astype(str))
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                yield sink.take()
+        yield sink.take()
+
+
+def export_screen(
+    df: pd.DataFrame,
+    path: Optional[Path] = None,
+    fmt: Optional[str] = None,
+    criteria: Optional[Dict] = None,
+    style: str = 'blend',
+    all_fields: bool = False,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+    factors: Optional[pd.DataFrame] = None,
+    one_per_issuer: Optional[str] = None,
+) -> Path:
+    """
+    Write the ranked universe to a file, chunk by chunk.
+
+    Args:
+        df: Snapshot (tickers x screener columns)
+        path: Output file (defaults to a timestamped file in ~/.investscout/exports)
+        fmt: 'csv', 'parquet' or 'jsonl' (defaults to the path's suffix, else csv)
+        criteria: Filter criteria (None exports every row)
+        style: Investing style used for the score and rank columns
+        all_fields: Include every column of df rather than EXPORT_COLUMNS
+        chunk_rows: Rows serialized at a time
+        factors: Precomputed factor scores (e.g. peer-relative) to score with
+        one_per_issuer: Keep one listing per issuer ('liquid' or 'cad', as
+            for rank_candidates); None exports every listing
+
+    Returns:
+        Path of the written file
+    """
+    if fmt is None:
+        fmt = Path(path).suffix.lstrip('.') if path and Path(path).suffix else 'csv'
+    if path is None:
+        path = EXPORT_DIR / f"screen-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp, 'wb') as f:
+            for data in iter_export(df, fmt, criteria, style, all_fields, chunk_rows, factors, one_per_issuer):
+                f.write(data)
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return path
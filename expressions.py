@@ -0,0 +1,289 @@
+"""
+Screen Expression Module
+A small, safe filter language over screener columns, e.g.
+    pe_ratio < 20 and dividend_yield > 0.03 and pct_from_high < -15
+Expressions are parsed once (no Python eval) into vectorized column
+operations and cached by their text.
+"""
+
+import operator
+import re
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+import pandas as pd
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that can't be parsed or evaluated."""
+
+
+# Grammar (lowest to highest precedence):
+#   expr       := and_expr ('or' and_expr)*
+#   and_expr   := not_expr ('and' not_expr)*
+#   not_expr   := 'not' not_expr | comparison
+#   comparison := sum (('<'|'<='|'>'|'>='|'=='|'!=') sum | 'not'? 'in' list)?
+#   sum        := term (('+'|'-') term)*
+#   term       := unary (('*'|'/') unary)*
+#   unary      := '-' unary | atom
+#   atom       := number | string | true | false | column | '(' expr ')'
+#   list       := '[' literal (',' literal)* ']'
+# Numbers accept k/M/B/T suffixes (2B == 2e9) for market-cap style values.
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)(?P<suffix>[kKmMbBtT](?![A-Za-z0-9_]))?
+      | (?P<string>'[^']*'|"[^"]*")
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op><=|>=|==|!=|[<>()\[\],+\-*/])
+    )""", re.VERBOSE)
+
+_SUFFIXES = {'k': 1e3, 'm': 1e6, 'b': 1e9, 't': 1e12}
+_KEYWORDS = {'and', 'or', 'not', 'in', 'true', 'false'}
+
+_COMPARISONS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+_ARITHMETIC = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+
+
+def _tokenize(text: str) -> List[Tuple[str, object]]:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ExpressionError(f"Unexpected character at position {pos}: {text[pos:pos + 10]!r}")
+        pos = match.end()
+        if match.group('number'):
+            value = float(match.group('number'))
+            if match.group('suffix'):
+                value *= _SUFFIXES[match.group('suffix').lower()]
+            tokens.append(('num', value))
+        elif match.group('string'):
+            tokens.append(('str', match.group('string')[1:-1]))
+        elif match.group('name'):
+            name = match.group('name')
+            if name.lower() in _KEYWORDS:
+                tokens.append(('kw', name.lower()))
+            else:
+                tokens.append(('col', name))
+        else:
+            tokens.append(('op', match.group('op')))
+    tokens.append(('end', None))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing nested tuples."""
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.columns = set()
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def accept(self, kind: str, value=None) -> bool:
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value=None):
+        if not self.accept(kind, value):
+            found = self.peek()[1] if self.peek()[0] != 'end' else 'end of expression'
+            raise ExpressionError(f"Expected {value or kind!r}, found {found!r}")
+
+    def parse(self):
+        node = self.expr()
+        if self.peek()[0] != 'end':
+            raise ExpressionError(f"Unexpected {self.peek()[1]!r}")
+        return node
+
+    def expr(self):
+        node = self.and_expr()
+        while self.accept('kw', 'or'):
+            node = ('or', node, self.and_expr())
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.accept('kw', 'and'):
+            node = ('and', node, self.not_expr())
+        return node
+
+    def not_expr(self):
+        if self.accept('kw', 'not'):
+            return ('not', self.not_expr())
+        return self.comparison()
+
+    def comparison(self):
+        node = self.sum()
+        token = self.peek()
+        if token[0] == 'op' and token[1] in _COMPARISONS:
+            self.next()
+            return ('cmp', token[1], node, self.sum())
+        if self.accept('kw', 'in'):
+            return ('in', node, self.literal_list())
+        if token == ('kw', 'not') and self.tokens[self.pos + 1] == ('kw', 'in'):
+            self.pos += 2
+            return ('not', ('in', node, self.literal_list()))
+        return node
+
+    def literal_list(self):
+        self.expect('op', '[')
+        values = [self.literal()]
+        while self.accept('op', ','):
+            values.append(self.literal())
+        self.expect('op', ']')
+        return tuple(values)
+
+    def literal(self):
+        kind, value = self.next()
+        if kind in ('num', 'str'):
+            return value
+        if kind == 'op' and value == '-' and self.peek()[0] == 'num':
+            return -self.next()[1]
+        raise ExpressionError(f"Expected a number or string in list, found {value!r}")
+
+    def sum(self):
+        node = self.term()
+        while self.peek()[0] == 'op' and self.peek()[1] in '+-':
+            node = ('arith', self.next()[1], node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek()[0] == 'op' and self.peek()[1] in '*/':
+            node = ('arith', self.next()[1], node, self.unary())
+        return node
+
+    def unary(self):
+        if self.accept('op', '-'):
+            return ('neg', self.unary())
+        return self.atom()
+
+    def atom(self):
+        kind, value = self.next()
+        if kind in ('num', 'str'):
+            return ('lit', value)
+        if kind == 'kw' and value in ('true', 'false'):
+            return ('lit', value == 'true')
+        if kind == 'col':
+            self.columns.add(value)
+            return ('col', value)
+        if kind == 'op' and value == '(':
+            node = self.expr()
+            self.expect('op', ')')
+            return node
+        found = value if kind != 'end' else 'end of expression'
+        raise ExpressionError(f"Unexpected {found!r}")
+
+
+def _as_mask(value, df: pd.DataFrame) -> pd.Series:
+    if isinstance(value, pd.Series):
+        if not pd.api.types.is_bool_dtype(value):
+            raise ExpressionError("Expected a true/false value here (e.g. a comparison)")
+        return value
+    if isinstance(value, bool):
+        return pd.Series(value, index=df.index)
+    raise ExpressionError("Expected a true/false value here (e.g. a comparison)")
+
+
+def _compile(node) -> Callable[[pd.DataFrame], object]:
+    """Turn a parse tree into a function of the frame."""
+    kind = node[0]
+
+    if kind == 'lit':
+        value = node[1]
+        return lambda df: value
+
+    if kind == 'col':
+        name = node[1]
+
+        def column(df):
+            if name not in df:
+                raise ExpressionError(f"Unknown column {name!r}. Available: {', '.join(map(str, df.columns))}")
+            return df[name]
+        return column
+
+    if kind == 'neg':
+        inner = _compile(node[1])
+        return lambda df: -inner(df)
+
+    if kind in ('arith', 'cmp'):
+        op = (_ARITHMETIC if kind == 'arith' else _COMPARISONS)[node[1]]
+        left, right = _compile(node[2]), _compile(node[3])
+        return lambda df: op(left(df), right(df))
+
+    if kind == 'in':
+        inner, values = _compile(node[1]), list(node[2])
+        return lambda df: inner(df).isin(values)
+
+    if kind == 'not':
+        inner = _compile(node[1])
+        return lambda df: ~_as_mask(inner(df), df)
+
+    if kind in ('and', 'or'):
+        op = operator.and_ if kind == 'and' else operator.or_
+        left, right = _compile(node[1]), _compile(node[2])
+        return lambda df: op(_as_mask(left(df), df), _as_mask(right(df), df))
+
+    raise ExpressionError(f"Unsupported expression node {kind!r}")
+
+
+class CompiledExpression:
+    """A parsed screen expression; call it with a DataFrame to get a mask."""
+
+    def __init__(self, text: str):
+        self.text = text
+        parser = _Parser(text)
+        self._fn = _compile(parser.parse())
+        self.columns = frozenset(parser.columns)
+
+    def __call__(self, df: pd.DataFrame) -> pd.Series:
+        try:
+            result = self._fn(df)
+        except ExpressionError:
+            raise
+        except TypeError as e:
+            raise ExpressionError(f"Type mismatch in {self.text!r}: {e}") from e
+        except (ArithmeticError, ValueError) as e:
+            # e.g. 1/0 between literals (column arithmetic gives inf/NaN instead)
+            raise ExpressionError(f"Can't evaluate {self.text!r}: {e}") from e
+        return _as_mask(result, df).fillna(False).astype(bool)
+
+    def __repr__(self):
+        return f"CompiledExpression({self.text!r})"
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text: str) -> CompiledExpression:
+    """
+    Parse a screen expression once; repeated texts come from the cache.
+
+    Args:
+        text: Expression such as "pe_ratio < 20 and sector in ['Energy']"
+
+    Returns:
+        CompiledExpression that maps a DataFrame to a boolean Series
+
+    Raises:
+        ExpressionError: If the text isn't a valid expression
+    """
+    return CompiledExpression(text.strip())
+
+
+def evaluate_expression(df: pd.DataFrame, text: str) -> pd.Series:
+    """Boolean mask of the rows of df matching the expression text."""
+    return compile_expression(text)(df)
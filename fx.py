@@ -0,0 +1,147 @@
+"""
+FX Module
+Exchange rates to USD, fetched once and cached locally (with bundled
+fallback rates for offline use), and vectorized USD-normalized price and
+market cap columns for mixed US/TSX universes.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from http_session import get_session
+from snapshots import DATA_DIR
+from data.fx_rates import FALLBACK_USD_RATES
+
+FX_CACHE_PATH = DATA_DIR / 'fx.json'
+
+# Rates are reused for this long, so a universe refresh fetches them at most once
+FX_TTL = 12 * 60 * 60
+
+# After a failed download (e.g. offline) rates aren't requested again for this long
+FX_RETRY_SECONDS = 15 * 60
+
+# Exchange suffixes whose listings trade in CAD (used when .info has no currency)
+CAD_SUFFIXES = ('.TO', '.V', '.NE', '.CN')
+
+_lock = threading.Lock()
+
+
+def _read_cache(path: Path) -> Dict:
+    if not path.exists():
+        return {'rates': {}, 'fetched': 0, 'source': None}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_cache(cache: Dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(cache, f, indent=2)
+    tmp.replace(path)
+
+
+def _download_rates(currencies: Iterable[str]) -> Dict[str, float]:
+    """Latest USD per unit for each currency from Yahoo's <CCY>USD=X pairs."""
+    pairs = {f'{c}USD=X': c for c in currencies if c != 'USD'}
+    if not pairs:
+        return {}
+    try:
+        data = yf.download(list(pairs), period='5d', progress=False, session=get_session())
+    except Exception:
+        return {}
+    if data is None or data.empty or 'Close' not in data:
+        return {}
+    closes = data['Close']
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(next(iter(pairs)))
+    last = closes.ffill().iloc[-1]
+    return {pairs[p]: float(v) for p, v in last.items() if p in pairs and pd.notna(v) and v > 0}
+
+
+def get_fx_rates(
+    currencies: Optional[Iterable[str]] = None,
+    max_age: float = FX_TTL,
+    path: Optional[Path] = None,
+) -> Dict[str, float]:
+    """
+    USD per unit of each currency, from the local cache when fresh enough.
+
+    Missing or stale rates are downloaded in one request; if that fails the
+    cached rate (however old) is used, then the bundled fallback rate, and
+    the download isn't retried for FX_RETRY_SECONDS.
+
+    Args:
+        currencies: Currency codes needed (defaults to the fallback set)
+        max_age: Seconds before cached rates are refreshed
+        path: Cache file (defaults to ~/.investscout/fx.json)
+
+    Returns:
+        Dict of currency -> USD per unit (always includes USD = 1.0)
+    """
+    path = Path(path or FX_CACHE_PATH)
+    wanted = set(currencies or FALLBACK_USD_RATES) | {'USD'}
+    with _lock:
+        cache = _read_cache(path)
+        rates = cache['rates']
+        stale = time.time() - cache['fetched'] >= max_age
+        needed = [c for c in wanted if c != 'USD' and (stale or c not in rates)]
+        if needed and time.time() - cache.get('attempted', 0) >= FX_RETRY_SECONDS:
+            fetched = _download_rates(needed)
+            cache['attempted'] = time.time()
+            if fetched:
+                rates.update(fetched)
+                cache.update(rates=rates, fetched=time.time(), source='yahoo')
+            _write_cache(cache, path)
+
+    result = {'USD': 1.0}
+    for currency in wanted - {'USD'}:
+        rate = rates.get(currency, FALLBACK_USD_RATES.get(currency))
+        if rate is not None:
+            result[currency] = rate
+    return result
+
+
+def infer_currency(df: pd.DataFrame) -> pd.Series:
+    """Trading currency per row: the fetched 'currency' field, else from the ticker suffix."""
+    tickers = df['ticker'].astype(str)
+    guessed = pd.Series(np.where(tickers.str.upper().str.endswith(CAD_SUFFIXES), 'CAD', 'USD'), index=df.index)
+    if 'currency' not in df:
+        return guessed
+    return df['currency'].where(df['currency'].notna() & (df['currency'] != ''), guessed)
+
+
+def add_usd_columns(df: pd.DataFrame, rates: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    Add currency, fx_to_usd, price_usd and market_cap_usd columns.
+
+    Args:
+        df: Screener frame with ticker, price and market_cap
+        rates: USD per unit by currency (defaults to get_fx_rates for the
+            currencies present)
+
+    Returns:
+        The frame with the added columns; rows in a currency without a
+        known rate get NaN USD values
+    """
+    if df.empty:
+        return df
+    df = df.copy()
+    currency = infer_currency(df)
+    if rates is None:
+        rates = get_fx_rates(currency.unique())
+    # One lookup per row against a handful of currencies, then plain multiplies
+    fx = currency.map(rates).astype('float64')
+
+    df['currency'] = currency
+    df['fx_to_usd'] = fx
+    df['price_usd'] = pd.to_numeric(df['price'], errors='coerce') * fx
+    df['market_cap_usd'] = pd.to_numeric(df['market_cap'], errors='coerce') * fx
+    return df
@@ -0,0 +1,108 @@
+"""
+HTTP Session Module
+Process-wide, connection-pooled HTTP session shared by every yfinance call.
+"""
+
+import threading
+import time
+from typing import Dict
+
+# yfinance creates a fresh session (TLS handshake + cookie/crumb round-trips)
+# for every yf.Ticker() that isn't handed one, so we hand them all this one.
+_lock = threading.Lock()
+_session = None
+_stats = {
+    'backend': None,
+    'pool_size': 0,
+    'sessions_created': 0,
+    'requests': 0,
+    'checkouts': 0,
+    'created_at': None,
+}
+
+
+def _record_request():
+    with _lock:
+        _stats['requests'] += 1
+
+
+def _build_session(pool_size: int):
+    """Create a keep-alive session, preferring curl_cffi (what yfinance expects)."""
+    try:
+        from curl_cffi import requests as curl_requests
+
+        class PooledCurlSession(curl_requests.Session):
+            def request(self, *args, **kwargs):
+                _record_request()
+                return super().request(*args, **kwargs)
+
+        # curl_cffi keeps one reusable curl handle per thread, so the pool is
+        # naturally sized to the worker count.
+        return PooledCurlSession(impersonate="chrome"), 'curl_cffi'
+    except ImportError:
+        import requests
+
+        class PooledRequestsSession(requests.Session):
+            def request(self, *args, **kwargs):
+                _record_request()
+                return super().request(*args, **kwargs)
+
+        session = PooledRequestsSession()
+        _mount_adapter(session, pool_size)
+        return session, 'requests'
+
+
+def _mount_adapter(session, pool_size: int):
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def get_session(pool_size: int = 10):
+    """
+    Return the shared HTTP session, creating it on first use.
+
+    Args:
+        pool_size: Number of concurrent connections to keep alive; the pool
+            grows if a later caller asks for more workers
+
+    Returns:
+        Session object accepted by yf.Ticker(session=...)
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session, backend = _build_session(pool_size)
+            _stats['backend'] = backend
+            _stats['pool_size'] = pool_size
+            _stats['sessions_created'] += 1
+            _stats['created_at'] = time.time()
+        elif pool_size > _stats['pool_size']:
+            if _stats['backend'] == 'requests':
+                _mount_adapter(_session, pool_size)
+            _stats['pool_size'] = pool_size
+        _stats['checkouts'] += 1
+        return _session
+
+
+def session_stats() -> Dict:
+    """Return a snapshot of the shared session's pool statistics."""
+    with _lock:
+        stats = dict(_stats)
+        if _session is not None:
+            stats['cookies'] = len(_session.cookies)
+        else:
+            stats['cookies'] = 0
+    return stats
+
+
+def close_session():
+    """Close the shared session; the next get_session() call opens a new one."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _stats['pool_size'] = 0
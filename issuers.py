@@ -0,0 +1,128 @@
+"""
+Issuers Module
+Maps share classes and cross-listings to one issuer so fundamentals and
+analyst data are fetched once per issuer (quotes per listing), and picks one
+listing per issuer for the ranking.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data.issuers import ISSUER_LISTINGS
+
+LISTING_PREFERENCES = ('liquid', 'cad')
+
+# Fields that belong to the issuer rather than the listing (target_price is
+# rescaled per listing, since each listing is quoted in its own price)
+SHARED_FIELDS = [
+    'name', 'target_price', 'pe_ratio', 'dividend_yield', 'payout_ratio',
+    'revenue_growth', 'earnings_growth', 'recommendation', 'recommendation_mean',
+    'num_analysts', 'sector', 'industry', 'most_recent_quarter', 'currency',
+]
+
+ISSUER_OF: Dict[str, str] = {
+    ticker: issuer for issuer, listings in ISSUER_LISTINGS.items() for ticker in listings
+}
+
+# Position within the issuer's listings (0 = primary, the most liquid)
+LISTING_RANK: Dict[str, int] = {
+    ticker: i for listings in ISSUER_LISTINGS.values() for i, ticker in enumerate(listings)
+}
+
+
+def primary_listing(ticker: str, requested: Optional[Iterable[str]] = None) -> str:
+    """
+    The listing whose fundamentals are shared by the issuer.
+
+    Args:
+        ticker: Any listing (unmapped tickers are their own primary)
+        requested: Tickers being fetched; the most liquid of the issuer's
+            listings among them is used, so nothing unrequested is fetched
+
+    Returns:
+        Primary listing (the issuer's most liquid one if none was requested)
+    """
+    issuer = ISSUER_OF.get(ticker)
+    if not issuer:
+        return ticker
+    listings = ISSUER_LISTINGS[issuer]
+    if requested is not None:
+        requested = set(requested)
+        return next((listing for listing in listings if listing in requested), listings[0])
+    return listings[0]
+
+
+def split_listings(tickers: List[str]) -> Dict[str, List[str]]:
+    """
+    Group tickers by issuer, picking each issuer's primary among the tickers.
+
+    Returns:
+        Dict of primary listing -> the issuer's other requested listings;
+        every key and value is one of tickers
+    """
+    requested = set(tickers)
+    groups: Dict[str, List[str]] = {}
+    for ticker in dict.fromkeys(tickers):
+        primary = primary_listing(ticker, requested)
+        others = groups.setdefault(primary, [])
+        if ticker != primary:
+            others.append(ticker)
+    return groups
+
+
+def _is_tsx(ticker: str) -> bool:
+    return ticker.upper().endswith('.TO')
+
+
+def listing_row(ticker: str, primary: Dict, quote: Dict) -> Dict:
+    """
+    Row for a secondary listing from its issuer's primary row and its own quote.
+
+    Args:
+        ticker: Secondary listing
+        primary: Full row of the primary listing (fetch_single_stock output)
+        quote: The listing's quote fields (fetch_quote output)
+
+    Returns:
+        Row with the issuer's fundamentals and the listing's price fields;
+        upside_pct/pct_from_high are left for add_derived_metrics
+    """
+    row = {field: primary.get(field) for field in SHARED_FIELDS}
+    row.update(quote)
+    row['ticker'] = ticker
+    # Carry the issuer's upside over rather than comparing a USD target with a CAD price
+    if primary.get('target_price') and primary.get('price') and quote.get('price'):
+        row['target_price'] = primary['target_price'] * quote['price'] / primary['price']
+    if _is_tsx(ticker) != _is_tsx(primary['ticker']):
+        # Other market, other currency: let fx.infer_currency go by the suffix
+        row['currency'] = None
+    return row
+
+
+def one_listing_per_issuer(df: pd.DataFrame, prefer: str = 'liquid') -> pd.Series:
+    """
+    Boolean mask keeping one row per issuer.
+
+    Args:
+        df: Screener frame with a ticker column
+        prefer: 'liquid' keeps the most liquid listing present; 'cad' keeps
+            the TSX listing when there is one (e.g. for RRSP accounts), else
+            the most liquid
+
+    Returns:
+        Boolean Series aligned with df; unmapped tickers are always kept
+    """
+    if prefer not in LISTING_PREFERENCES:
+        raise ValueError(f"Unknown listing preference {prefer!r}; choose from {LISTING_PREFERENCES}")
+    tickers = df['ticker'].astype(str)
+    issuer = tickers.map(ISSUER_OF).fillna(tickers)
+    preference = tickers.map(LISTING_RANK).fillna(0).to_numpy()
+    if prefer == 'cad':
+        preference = np.where(tickers.str.upper().str.endswith('.TO'), 0, preference + 1)
+
+    order = np.argsort(preference, kind='stable')
+    keep = np.zeros(len(df), dtype=bool)
+    keep[order[~issuer.iloc[order].duplicated().to_numpy()]] = True
+    return pd.Series(keep, index=df.index)
@@ -0,0 +1,460 @@
+"""
+Load Test Module
+Drives the screening pipeline (or, optionally, the Streamlit app headless)
+with many concurrent simulated users against a stubbed data provider, so
+throughput, latency and fetch volume can be measured offline.
+
+Run with:
+    python loadtest.py --users 20 --screens 10 --latency-ms 80 --error-rate 0.02
+    python loadtest.py --users 5 --app        # headless app via streamlit.testing
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Dict, List, Optional
+from unittest import mock
+
+import importlib
+from pathlib import Path
+
+import numpy as np
+
+import fx
+import screener
+import snapshots
+from refresh import clear_records, refresh_stock_data
+from screener import STYLE_WEIGHTS, apply_filters, rank_candidates
+from data.sp500 import SP500_TICKERS, SECTOR_MAP
+from data.fx_rates import FALLBACK_USD_RATES
+from data.tsx60 import TSX_TICKERS, TSX_SECTOR_MAP
+
+SECTORS = [
+    "Technology", "Healthcare", "Financials", "Consumer Discretionary",
+    "Consumer Staples", "Energy", "Industrials", "Materials", "Real Estate",
+    "Utilities", "Communication Services",
+]
+
+RECOMMENDATIONS = ['strong_buy', 'buy', 'hold', 'underperform', 'sell']
+
+# Module-level paths fixed from snapshots.DATA_DIR at import time, which
+# isolated_data_dir redirects (setting INVESTSCOUT_HOME later has no effect)
+DATA_PATHS = {
+    'snapshots': ['DATA_DIR', 'SNAPSHOT_DIR'],
+    'watchlists': ['WATCHLIST_PATH'],
+    'fx': ['FX_CACHE_PATH'],
+    'statements': ['STATEMENTS_PATH'],
+    'diversify': ['PRICE_CACHE_PATH'],
+    'export': ['EXPORT_DIR'],
+    'lookthrough': ['HOLDINGS_DIR'],
+    'weight_sweep': ['CUSTOM_STYLES_PATH'],
+    'workqueue': ['QUEUE_PATH'],
+}
+
+# Advanced-filter texts a simulated user may type (empty = none)
+EXPRESSIONS = [
+    '',
+    '',
+    'pe_ratio < 20',
+    'dividend_yield > 0.03 and payout_ratio < 0.8',
+    "sector in ['Energy', 'Utilities'] or revenue_growth > 0.2",
+    'pct_from_high < -15 and upside_pct > 20',
+]
+
+
+class StubProvider:
+    """
+    Stand-in for yf.Ticker with configurable latency and failure rate.
+
+    Each ticker gets deterministic synthetic fundamentals; quotes drift a
+    little on every call so quote refreshes produce changes.
+    """
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 20.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._seed = seed
+        self._lock = threading.Lock()
+        self.counts = {'info': 0, 'fast_info': 0, 'fx': 0, 'errors': 0}
+
+    def _call(self, kind: str):
+        with self._lock:
+            self.counts[kind] += 1
+            delay = max(self._rng.gauss(self.latency_ms, self.jitter_ms), 0) / 1000
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.counts['errors'] += 1
+        time.sleep(delay)
+        if failed:
+            raise ConnectionError(f"stubbed {kind} failure")
+
+    def fundamentals(self, ticker: str) -> Dict:
+        """Synthetic .info payload for a ticker (same every call)."""
+        rng = np.random.default_rng(zlib.crc32(f'{self._seed}:{ticker}'.encode()))
+        price = float(rng.lognormal(4, 1))
+        high = price * float(rng.uniform(1.0, 1.6))
+        sector = SECTOR_MAP.get(ticker) or TSX_SECTOR_MAP.get(ticker) or SECTORS[int(rng.integers(len(SECTORS)))]
+        covered = rng.random() > 0.1
+        return {
+            'shortName': f'{ticker} Corp',
+            'regularMarketPrice': price,
+            'targetMeanPrice': price * float(rng.normal(1.12, 0.2)) if covered else None,
+            'marketCap': float(rng.lognormal(23, 1.5)),
+            'forwardPE': float(rng.normal(22, 12)),
+            'dividendYield': float(max(rng.normal(0.02, 0.02), 0)),
+            'payoutRatio': float(rng.uniform(0, 1.2)),
+            'revenueGrowth': float(rng.normal(0.08, 0.15)),
+            'earningsGrowth': float(rng.normal(0.1, 0.3)),
+            'recommendationKey': RECOMMENDATIONS[int(rng.integers(len(RECOMMENDATIONS)))] if covered else 'none',
+            'recommendationMean': float(rng.uniform(1, 4.5)) if covered else None,
+            'numberOfAnalystOpinions': int(rng.integers(1, 40)) if covered else 0,
+            'fiftyTwoWeekHigh': high,
+            'fiftyTwoWeekLow': price * float(rng.uniform(0.5, 1.0)),
+            'fiftyDayAverage': price * float(rng.uniform(0.9, 1.1)),
+            'twoHundredDayAverage': price * float(rng.uniform(0.8, 1.2)),
+            'sector': sector,
+            'industry': f'{sector} Industry',
+            'currency': 'CAD' if ticker.endswith('.TO') else 'USD',
+        }
+
+    def fx_rates(self, currencies) -> Dict[str, float]:
+        """Stand-in for fx._download_rates: the bundled rates, no network."""
+        self._call('fx')
+        return {c: FALLBACK_USD_RATES[c] for c in currencies if c in FALLBACK_USD_RATES and c != 'USD'}
+
+    def ticker(self, symbol: str, session=None) -> '_StubTicker':
+        return _StubTicker(self, symbol)
+
+
+class _StubTicker:
+    """Just enough of yf.Ticker for fetch_single_stock and fetch_quote."""
+
+    def __init__(self, provider: StubProvider, symbol: str):
+        self._provider = provider
+        self._symbol = symbol
+
+    @property
+    def info(self) -> Dict:
+        self._provider._call('info')
+        return self._provider.fundamentals(self._symbol)
+
+    @property
+    def fast_info(self) -> Dict:
+        self._provider._call('fast_info')
+        info = self._provider.fundamentals(self._symbol)
+        price = info['regularMarketPrice'] * random.uniform(0.98, 1.02)
+        return {
+            'lastPrice': price,
+            'marketCap': info['marketCap'] * price / info['regularMarketPrice'],
+            'yearHigh': max(info['fiftyTwoWeekHigh'], price),
+            'yearLow': min(info['fiftyTwoWeekLow'], price),
+            'fiftyDayAverage': info['fiftyDayAverage'],
+            'twoHundredDayAverage': info['twoHundredDayAverage'],
+        }
+
+
+@contextmanager
+def stubbed_provider(provider: StubProvider):
+    """Route every yf.Ticker call made by the screener, and FX downloads, through the stub."""
+    with mock.patch.object(screener.yf, 'Ticker', provider.ticker), \
+            mock.patch.object(fx, '_download_rates', provider.fx_rates):
+        yield provider
+
+
+@contextmanager
+def isolated_data_dir(directory: Optional[str] = None):
+    """
+    Point every module's data paths (snapshots, watchlists, caches) at a
+    scratch directory, so a load test never touches ~/.investscout.
+
+    Args:
+        directory: Data directory to use (defaults to a new temp directory)
+
+    Returns:
+        Context manager yielding the directory as a Path
+    """
+    directory = Path(directory or tempfile.mkdtemp(prefix='investscout-load-'))
+    home = snapshots.DATA_DIR
+    # Import everything first: a module imported while DATA_DIR is patched
+    # would derive its paths from the scratch directory
+    modules = {name: importlib.import_module(name) for name in DATA_PATHS}
+    with ExitStack() as stack:
+        for module_name, names in DATA_PATHS.items():
+            module = modules[module_name]
+            for name in names:
+                stack.enter_context(mock.patch.object(
+                    module, name, directory / getattr(module, name).relative_to(home)
+                ))
+        yield directory
+
+
+def random_criteria(rng: random.Random) -> Dict:
+    """Criteria as the sidebar would build them, with randomized choices."""
+    criteria = {
+        'sectors': SECTORS if rng.random() < 0.5 else rng.sample(SECTORS, rng.randint(1, 5)),
+        'min_analysts': rng.choice([0, 3, 5, 10]),
+        'min_upside': rng.choice([-10, 0, 10, 20]),
+        'buy_ratings_only': rng.random() < 0.3,
+        'expression': rng.choice(EXPRESSIONS),
+    }
+    criteria['min_market_cap'] = rng.choice([10e9, 2e9, 500e6])
+    return criteria
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {'p50_ms': np.nan, 'p90_ms': np.nan, 'p99_ms': np.nan, 'max_ms': np.nan}
+    ms = np.array(latencies) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99, 'max_ms': ms.max()}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _report(users: int, tickers: int, latencies: List[float], failures: Dict[str, int],
+            wall: float, provider: StubProvider, rss_before: Optional[float]) -> Dict:
+    completed = len(latencies)
+    calls = provider.counts['info'] + provider.counts['fast_info']
+    return {
+        'users': users,
+        'tickers': tickers,
+        'screens': completed,
+        'failed_screens': sum(failures.values()),
+        'failures': failures,
+        'wall_s': wall,
+        'screens_per_s': completed / wall if wall else np.nan,
+        **_percentiles(latencies),
+        'info_calls': provider.counts['info'],
+        'quote_calls': provider.counts['fast_info'],
+        'provider_errors': provider.counts['errors'],
+        'calls_per_screen': calls / max(completed, 1),
+        'peak_rss_mb': _peak_rss_mb(),
+        'rss_before_mb': rss_before,
+    }
+
+
+def run_load_test(
+    users: int = 10,
+    screens_per_user: int = 5,
+    tickers: Optional[List[str]] = None,
+    latency_ms: float = 50.0,
+    jitter_ms: float = 20.0,
+    error_rate: float = 0.0,
+    think_time: float = 0.0,
+    quote_ttl: Optional[float] = None,
+    max_workers: int = 10,
+    seed: int = 0,
+) -> Dict:
+    """
+    Run concurrent simulated screening sessions against a stub provider.
+
+    Each user repeatedly does what the Find Candidates button does:
+    refresh the universe, apply randomized criteria and rank with a
+    random style. Users share the process-wide refresh records, as
+    sessions on one Streamlit server do.
+
+    Args:
+        users: Number of concurrent simulated users
+        screens_per_user: Screens each user runs
+        tickers: Universe (defaults to S&P 500 + TSX lists)
+        latency_ms: Mean stub latency per provider call
+        jitter_ms: Standard deviation of that latency
+        error_rate: Fraction of provider calls that raise
+        think_time: Mean seconds a user pauses between screens
+        quote_ttl: Quote TTL passed to refresh_stock_data (None keeps the default)
+        max_workers: Fetch threads per refresh
+        seed: Random seed for criteria and stub data
+
+    Returns:
+        Report dict: screens, failed screens, wall time, throughput,
+        latency percentiles, provider call counts and peak RSS
+    """
+    tickers = tickers or SP500_TICKERS + TSX_TICKERS
+    provider = StubProvider(latency_ms, jitter_ms, error_rate, seed)
+    latencies: List[float] = []
+    failures: Dict[str, int] = {}
+    result_lock = threading.Lock()
+    refresh_kwargs = {'max_workers': max_workers}
+    if quote_ttl is not None:
+        refresh_kwargs['quote_ttl'] = quote_ttl
+
+    def session(user: int):
+        rng = random.Random(seed * 1000 + user)
+        for _ in range(screens_per_user):
+            criteria = random_criteria(rng)
+            style = rng.choice(list(STYLE_WEIGHTS))
+            start = time.perf_counter()
+            try:
+                df = refresh_stock_data(tickers, **refresh_kwargs)
+                if not df.empty:
+                    rank_candidates(apply_filters(df, criteria), style, rng.choice([10, 20, 50]))
+                error = None
+            except Exception as e:
+                error = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with result_lock:
+                if error:
+                    failures[error] = failures.get(error, 0) + 1
+                else:
+                    latencies.append(elapsed)
+            if think_time:
+                time.sleep(rng.expovariate(1 / think_time))
+
+    clear_records()
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    with stubbed_provider(provider), isolated_data_dir():
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            list(executor.map(session, range(users)))
+    wall = time.perf_counter() - started
+
+    return _report(users, len(tickers), latencies, failures, wall, provider, rss_before)
+
+
+def _set_widget(elements, label: str, value):
+    for element in elements:
+        if element.label == label:
+            element.set_value(value)
+            return
+    raise KeyError(f"No widget labelled {label!r}")
+
+
+def run_app_load_test(
+    users: int = 5,
+    screens_per_user: int = 3,
+    latency_ms: float = 50.0,
+    jitter_ms: float = 20.0,
+    error_rate: float = 0.0,
+    timeout: float = 300,
+    seed: int = 0,
+) -> Dict:
+    """
+    Like run_load_test, but each user drives app.py headless through
+    streamlit.testing, so rendering and snapshot/watchlist work is included.
+
+    Args:
+        users: Number of concurrent simulated users
+        screens_per_user: Button clicks per user
+        latency_ms: Mean stub latency per provider call
+        jitter_ms: Standard deviation of that latency
+        error_rate: Fraction of provider calls that raise
+        timeout: Seconds allowed per script run
+        seed: Random seed for criteria and stub data
+
+    Returns:
+        Report dict with the same keys as run_load_test
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    provider = StubProvider(latency_ms, jitter_ms, error_rate, seed)
+    latencies: List[float] = []
+    failures: Dict[str, int] = {}
+    result_lock = threading.Lock()
+
+    def session(user: int):
+        rng = random.Random(seed * 1000 + user)
+        at = AppTest.from_file(app_path, default_timeout=timeout)
+        at.run()
+        for _ in range(screens_per_user):
+            criteria = random_criteria(rng)
+            start = time.perf_counter()
+            try:
+                _set_widget(at.sidebar.selectbox, "What's your investment approach?",
+                            rng.choice(["Blend", "Growth", "Value", "Dividend"]))
+                _set_widget(at.sidebar.slider, "Minimum analyst coverage", criteria['min_analysts'])
+                _set_widget(at.sidebar.slider, "Minimum upside to target (%)", criteria['min_upside'])
+                _set_widget(at.sidebar.checkbox, "Buy ratings only", criteria['buy_ratings_only'])
+                _set_widget(at.sidebar.text_input, "Advanced filter", criteria['expression'])
+                at.sidebar.button[-1].click()
+                at.run()
+                error = at.exception[0].message if at.exception else None
+            except Exception as e:
+                error = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with result_lock:
+                if error:
+                    failures[error] = failures.get(error, 0) + 1
+                else:
+                    latencies.append(elapsed)
+
+    clear_records()
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    with stubbed_provider(provider), isolated_data_dir():
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            list(executor.map(session, range(users)))
+    wall = time.perf_counter() - started
+
+    return _report(users, len(SP500_TICKERS) + len(TSX_TICKERS), latencies, failures, wall, provider, rss_before)
+
+
+def format_report(report: Dict) -> str:
+    """Human-readable summary of a load test report."""
+    rows = [
+        ('Users', f"{report['users']}"),
+        ('Universe', f"{report['tickers']} tickers"),
+        ('Screens completed', f"{report['screens']}"),
+        ('Screens failed', f"{report['failed_screens']} {report['failures'] or ''}".strip()),
+        ('Wall time', f"{report['wall_s']:.2f} s"),
+        ('Throughput', f"{report['screens_per_s']:.2f} screens/s"),
+        ('Latency p50 / p90 / p99', f"{report['p50_ms']:.0f} / {report['p90_ms']:.0f} / {report['p99_ms']:.0f} ms"),
+        ('Latency max', f"{report['max_ms']:.0f} ms"),
+        ('Provider calls (info / quote)', f"{report['info_calls']} / {report['quote_calls']}"),
+        ('Provider errors injected', f"{report['provider_errors']}"),
+        ('Calls per screen', f"{report['calls_per_screen']:.1f}"),
+    ]
+    if report['peak_rss_mb'] is not None:
+        rows.append(('Peak RSS', f"{report['peak_rss_mb']:.0f} MB (before run: {report['rss_before_mb']:.0f} MB)"))
+    width = max(len(label) for label, _ in rows)
+    return '\n'.join(f"{label.ljust(width)}  {value}" for label, value in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the InvestScout screener")
+    parser.add_argument('--users', type=int, default=10, help="Concurrent simulated users")
+    parser.add_argument('--screens', type=int, default=5, help="Screens per user")
+    parser.add_argument('--universe', type=int, default=None,
+                        help="Use N synthetic tickers instead of the S&P 500 + TSX lists")
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--think-time', type=float, default=0.0, help="Mean pause between screens (s)")
+    parser.add_argument('--quote-ttl', type=float, default=None,
+                        help="Override the quote TTL (0 re-quotes on every screen during market hours)")
+    parser.add_argument('--workers', type=int, default=10, help="Fetch threads per refresh")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--app', action='store_true',
+                        help="Drive app.py headless (needs streamlit) instead of the pipeline")
+    args = parser.parse_args()
+
+    if args.app:
+        report = run_app_load_test(args.users, args.screens, args.latency_ms,
+                                   args.jitter_ms, args.error_rate, seed=args.seed)
+    else:
+        tickers = [f'SYN{i:05d}' for i in range(args.universe)] if args.universe else None
+        report = run_load_test(
+            args.users, args.screens, tickers, args.latency_ms, args.jitter_ms,
+            args.error_rate, args.think_time, args.quote_ttl, args.workers, args.seed,
+        )
+    print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+ETF Look-Through Module
+Loads ETF holdings from locally cached holdings files into a sparse
+ETF x stock weight matrix, and uses it for look-through exposure, each
+ETF's weighted upside and score, and flagging candidates already held
+through the user's ETFs.
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from http_session import get_session
+from issuers import ISSUER_OF
+from screener import calculate_scores
+from snapshots import DATA_DIR
+from data.tsx60 import TSX_SECTOR_MAP
+
+# One CSV per fund, named after it (e.g. VFV.TO.csv), as exported by the
+# provider: a ticker/symbol column, a weight column (percent or fraction)
+# and optionally an exchange column
+HOLDINGS_DIR = DATA_DIR / 'holdings'
+
+ETF_TICKERS = [ticker for ticker, sector in TSX_SECTOR_MAP.items() if sector == 'ETF']
+
+_TICKER_COLUMNS = ('ticker', 'symbol', 'issuer ticker')
+_WEIGHT_COLUMNS = ('weight', 'weight (%)', '% of net assets', 'holding percent', 'market value weight', '% of funds')
+_TSX_EXCHANGES = ('toronto', 'tsx')
+
+_lock = threading.Lock()
+_cache: Dict[Path, tuple] = {}
+
+
+class HoldingsMatrix:
+    """
+    Sparse ETF x stock weight matrix in coordinate form.
+
+    Row i is an ETF, column j a stock (one column per issuer, so a fund
+    holding RY and a candidate RY.TO line up); products cost O(holdings).
+    """
+
+    def __init__(self, etfs: pd.Index, stocks: pd.Index, rows: np.ndarray, cols: np.ndarray, weights: np.ndarray):
+        self.etfs = etfs
+        self.stocks = stocks
+        self.rows = rows
+        self.cols = cols
+        self.weights = weights
+
+    @property
+    def shape(self):
+        return len(self.etfs), len(self.stocks)
+
+    def dot(self, values: np.ndarray) -> np.ndarray:
+        """W @ values: per-ETF weighted sum of a per-stock vector."""
+        return np.bincount(self.rows, weights=self.weights * values[self.cols], minlength=len(self.etfs))
+
+    def rdot(self, amounts: np.ndarray) -> np.ndarray:
+        """amounts @ W: per-stock exposure from a per-ETF vector of amounts."""
+        return np.bincount(self.cols, weights=self.weights * amounts[self.rows], minlength=len(self.stocks))
+
+    def __repr__(self):
+        return f"HoldingsMatrix({self.shape[0]} ETFs x {self.shape[1]} stocks, {len(self.weights)} holdings)"
+
+
+def issuer_keys(tickers: pd.Series) -> pd.Series:
+    """Issuer of each ticker (see issuers.py); unmapped tickers are their own issuer."""
+    tickers = tickers.astype(str)
+    return tickers.map(ISSUER_OF).fillna(tickers)
+
+
+def _find_column(df: pd.DataFrame, names) -> Optional[str]:
+    lowered = {str(c).strip().lower(): c for c in df.columns}
+    return next((lowered[n] for n in names if n in lowered), None)
+
+
+def _read_holdings_file(path: Path) -> pd.DataFrame:
+    raw = pd.read_csv(path)
+    ticker_col = _find_column(raw, _TICKER_COLUMNS)
+    weight_col = _find_column(raw, _WEIGHT_COLUMNS)
+    if ticker_col is None or weight_col is None:
+        raise ValueError(f"{path.name}: needs a ticker/symbol and a weight column, got {list(raw.columns)}")
+
+    tickers = raw[ticker_col].astype(str).str.strip().str.upper()
+    weights = pd.to_numeric(raw[weight_col].astype(str).str.rstrip('%').str.replace(',', ''), errors='coerce')
+    exchange_col = _find_column(raw, ('exchange',))
+    if exchange_col is not None:
+        on_tsx = raw[exchange_col].astype(str).str.lower().str.contains('|'.join(_TSX_EXCHANGES))
+        # Provider files use RCI.B for what Yahoo calls RCI-B.TO
+        tsx = tickers.str.replace('.', '-', regex=False).str.replace(' ', '-', regex=False) + '.TO'
+        tickers = tickers.where(~on_tsx | tickers.str.endswith('.TO'), tsx)
+
+    holdings = pd.DataFrame({'ticker': tickers, 'weight': weights})
+    holdings = holdings[(holdings['weight'] > 0) & ~holdings['ticker'].isin(['', 'NAN', '-'])]
+    if holdings['weight'].sum() > 1.5:
+        holdings['weight'] = holdings['weight'] / 100
+    return holdings.groupby('ticker', as_index=False, sort=False)['weight'].sum()
+
+
+def load_holdings(etfs: Optional[List[str]] = None, directory: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Holdings of each ETF from its cached holdings file.
+
+    Files are re-read only when they change.
+
+    Args:
+        etfs: Funds to load (defaults to every file in the directory)
+        directory: Holdings directory (defaults to ~/.investscout/holdings)
+
+    Returns:
+        Long DataFrame with etf, ticker and weight (fraction of the fund);
+        funds without a file are left out
+    """
+    directory = Path(directory or HOLDINGS_DIR)
+    if etfs is None:
+        paths = sorted(directory.glob('*.csv'))
+    else:
+        paths = [directory / f'{etf}.csv' for etf in etfs]
+
+    frames = []
+    for path in paths:
+        if not path.exists():
+            continue
+        mtime = path.stat().st_mtime
+        with _lock:
+            cached = _cache.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, _read_holdings_file(path))
+            with _lock:
+                _cache[path] = cached
+        frames.append(cached[1].assign(etf=path.stem))
+
+    if not frames:
+        return pd.DataFrame({'etf': pd.Series(dtype=str), 'ticker': pd.Series(dtype=str), 'weight': pd.Series(dtype=float)})
+    return pd.concat(frames, ignore_index=True)[['etf', 'ticker', 'weight']]
+
+
+def available_etfs(directory: Optional[Path] = None) -> List[str]:
+    """Funds that have a cached holdings file."""
+    return sorted(path.stem for path in Path(directory or HOLDINGS_DIR).glob('*.csv'))
+
+
+def cache_top_holdings(etf: str, directory: Optional[Path] = None) -> Path:
+    """
+    Seed a fund's holdings file from Yahoo's top holdings.
+
+    Yahoo only lists the largest ~10 positions, so prefer the full file
+    from the fund provider's site where there is one.
+
+    Returns:
+        Path of the written file
+    """
+    top = yf.Ticker(etf, session=get_session()).funds_data.top_holdings
+    if top is None or top.empty:
+        raise ValueError(f"No holdings found for {etf}")
+
+    path = Path(directory or HOLDINGS_DIR) / f'{etf}.csv'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    pd.DataFrame({
+        'ticker': top.index.astype(str),
+        'weight': top['Holding Percent'].to_numpy(),
+    }).to_csv(tmp, index=False)
+    tmp.replace(path)
+    return path
+
+
+def holdings_matrix(holdings: pd.DataFrame) -> HoldingsMatrix:
+    """Build the sparse ETF x issuer weight matrix from load_holdings output."""
+    rows, etfs = pd.factorize(holdings['etf'])
+    cols, stocks = pd.factorize(issuer_keys(holdings['ticker']))
+    return HoldingsMatrix(
+        pd.Index(etfs, name='etf'), pd.Index(stocks, name='issuer'),
+        rows, cols, holdings['weight'].to_numpy(dtype='float64'),
+    )
+
+
+def _stock_values(matrix: HoldingsMatrix, universe: pd.DataFrame, values: pd.Series) -> np.ndarray:
+    """Align a per-row universe series to the matrix columns (NaN where not in the universe)."""
+    by_issuer = pd.Series(values.to_numpy(), index=issuer_keys(universe['ticker']).to_numpy())
+    by_issuer = by_issuer[~by_issuer.index.duplicated()]
+    return by_issuer.reindex(matrix.stocks).to_numpy(dtype='float64')
+
+
+def etf_lookthrough(
+    universe: pd.DataFrame,
+    style: str = 'blend',
+    holdings: Optional[pd.DataFrame] = None,
+    factors: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Holdings-weighted upside and composite score for each ETF.
+
+    Args:
+        universe: Full snapshot (scores are computed on it, not a filtered frame)
+        style: Investing style for the composite score
+        holdings: load_holdings output (defaults to every cached file)
+        factors: Precomputed factor scores (e.g. peer-relative) to score with
+
+    Returns:
+        DataFrame indexed by etf with holdings, coverage (share of the
+        fund's weight found in the universe), weighted_upside and
+        weighted_score (both averaged over the covered weight)
+    """
+    if holdings is None:
+        holdings = load_holdings()
+    matrix = holdings_matrix(holdings)
+    scores = calculate_scores(universe, style, factors)
+    upside = _stock_values(matrix, universe, pd.to_numeric(universe['upside_pct'], errors='coerce'))
+    score = _stock_values(matrix, universe, scores)
+
+    covered = matrix.dot(np.isfinite(score).astype('float64'))
+    with_upside = matrix.dot(np.isfinite(upside).astype('float64'))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weighted_upside = matrix.dot(np.nan_to_num(upside)) / with_upside
+        weighted_score = matrix.dot(np.nan_to_num(score)) / covered
+
+    return pd.DataFrame({
+        'holdings': np.bincount(matrix.rows, minlength=len(matrix.etfs)),
+        'coverage': covered / matrix.dot(np.ones(len(matrix.stocks))),
+        'weighted_upside': np.where(with_upside > 0, weighted_upside, np.nan),
+        'weighted_score': np.where(covered > 0, weighted_score, np.nan).round(2),
+    }, index=matrix.etfs)
+
+
+def lookthrough_exposure(positions: Dict[str, float], holdings: Optional[pd.DataFrame] = None) -> pd.Series:
+    """
+    Share of an ETF portfolio held in each underlying issuer.
+
+    Args:
+        positions: Amount held in each ETF (any unit; only proportions matter)
+        holdings: load_holdings output (defaults to the positions' files)
+
+    Returns:
+        Series indexed by issuer, largest exposure first
+    """
+    if holdings is None:
+        holdings = load_holdings(list(positions))
+    matrix = holdings_matrix(holdings[holdings['etf'].isin(list(positions))])
+    amounts = pd.Series(positions, dtype='float64').reindex(matrix.etfs).fillna(0).to_numpy()
+    total = amounts.sum()
+    exposure = matrix.rdot(amounts / total if total else amounts)
+    return pd.Series(exposure, index=matrix.stocks, name='exposure').sort_values(ascending=False)
+
+
+def flag_overlap(
+    candidates: pd.DataFrame,
+    positions: Dict[str, float],
+    holdings: Optional[pd.DataFrame] = None,
+    min_exposure: float = 0.0,
+) -> pd.DataFrame:
+    """
+    Mark candidates already held through the given ETFs.
+
+    Args:
+        candidates: Screen results with a ticker column
+        positions: Amount held in each ETF (only proportions matter)
+        holdings: load_holdings output (defaults to the positions' files)
+        min_exposure: Exposure (fraction of the ETF portfolio) above which a
+            candidate counts as overlapping
+
+    Returns:
+        Copy of candidates with etf_exposure, held_by (comma-separated
+        ETFs) and overlap columns
+    """
+    if holdings is None:
+        holdings = load_holdings(list(positions))
+    holdings = holdings[holdings['etf'].isin(list(positions))]
+    exposure = lookthrough_exposure(positions, holdings)
+
+    keys = issuer_keys(candidates['ticker'])
+    # Only the candidates' holdings need their fund names joined
+    holders = issuer_keys(holdings['ticker'])
+    held = holders.isin(keys).to_numpy()
+    held_by = holdings['etf'][held].groupby(holders[held].to_numpy()).agg(', '.join)
+    flagged = candidates.copy()
+    flagged['etf_exposure'] = keys.map(exposure).fillna(0.0).to_numpy()
+    flagged['held_by'] = keys.map(held_by).fillna('').to_numpy()
+    flagged['overlap'] = flagged['etf_exposure'] > min_exposure
+    return flagged
@@ -0,0 +1,215 @@
+"""
+Parallel Screening Module
+Filters and scores very large universes on a process pool, sharing the
+frame with workers through shared memory instead of pickling it.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from issuers import ISSUER_OF, one_listing_per_issuer
+from screener import (
+    apply_filters, calculate_scores, criterion_columns, filter_mask, rank_candidates, style_weights,
+)
+
+# Below this many rows the vectorized single-process path is faster than
+# paying for process start-up and shared-memory setup.
+PARALLEL_MIN_ROWS = 200_000
+
+# Text columns filters compare against; shipped to workers as category codes
+SHARED_TEXT_COLUMNS = ['sector', 'industry', 'recommendation', 'currency']
+
+# Precomputed factor scores ride along in the shared matrix under this prefix
+_FACTOR_PREFIX = '__factor__'
+
+
+def _pack_frame(
+    df: pd.DataFrame,
+    text_columns: Optional[List[str]] = None,
+    extra: Optional[Dict[str, np.ndarray]] = None,
+) -> Tuple[shared_memory.SharedMemory, Tuple[int, int], List[str], Dict[str, List]]:
+    """
+    Copy the columns workers need into one shared float64 matrix.
+
+    Numeric columns are stored as-is; the text columns filters read
+    (SHARED_TEXT_COLUMNS plus text_columns, e.g. those an expression
+    names) are stored as category codes, with the categories returned
+    separately. Other free-text columns such as name are left behind.
+    Arrays in extra (one value per row) are appended after df's columns.
+    """
+    text = set(SHARED_TEXT_COLUMNS) | set(text_columns or [])
+    extra = extra or {}
+    columns = [
+        name for name in df.columns
+        if name in text
+        or pd.api.types.is_bool_dtype(df[name]) or pd.api.types.is_numeric_dtype(df[name])
+    ]
+    shape = (len(df), len(columns) + len(extra))
+    shm = shared_memory.SharedMemory(create=True, size=max(shape[0] * shape[1] * 8, 1))
+    matrix = np.ndarray(shape, dtype='float64', buffer=shm.buf, order='F')
+
+    categories = {}
+    for i, name in enumerate(columns):
+        col = df[name]
+        if name in text and not (pd.api.types.is_bool_dtype(col) or pd.api.types.is_numeric_dtype(col)):
+            cat = pd.Categorical(col.astype('object').where(col.notna(), None))
+            categories[name] = list(cat.categories)
+            matrix[:, i] = cat.codes
+        else:
+            matrix[:, i] = col.to_numpy(dtype='float64', na_value=np.nan)
+    for i, values in enumerate(extra.values(), start=len(columns)):
+        matrix[:, i] = values
+    del matrix
+    return shm, shape, columns + list(extra), categories
+
+
+def _unpack_chunk(block: np.ndarray, columns: List[str], categories: Dict[str, List]) -> pd.DataFrame:
+    """Rebuild a DataFrame over a slice of the shared matrix."""
+    data = {}
+    for i, name in enumerate(columns):
+        values = block[:, i]
+        if name in categories:
+            codes = np.nan_to_num(values, nan=-1).astype('int64')
+            data[name] = pd.Categorical.from_codes(codes, categories=categories[name]).astype('object')
+        else:
+            data[name] = values
+    return pd.DataFrame(data)
+
+
+def _screen_chunk(shm_name: str, shape: Tuple[int, int], columns: List[str],
+                  categories: Dict[str, List], start: int, stop: int,
+                  criteria: Dict, weights: Dict[str, float], top_k: int,
+                  excluded: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Worker: filter and score rows [start, stop) and return the local top-k.
+
+    Rows at the excluded positions count as passing filters but aren't
+    ranked (listings another of the issuer's listings stands in for).
+
+    Returns:
+        (row positions in the full frame, their scores, rows passing filters)
+    """
+    # Pool workers share the parent's resource tracker, so attaching here
+    # doesn't transfer ownership: the parent still unlinks the block.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        matrix = np.ndarray(shape, dtype='float64', buffer=shm.buf, order='F')
+        chunk = _unpack_chunk(matrix[start:stop], columns, categories)
+        chunk.index = pd.RangeIndex(start, stop)
+        del matrix
+
+        factor_columns = [name for name in chunk.columns if name.startswith(_FACTOR_PREFIX)]
+        factors = chunk[factor_columns].rename(columns=lambda name: name[len(_FACTOR_PREFIX):])
+        chunk = chunk.drop(columns=factor_columns)
+
+        filtered = apply_filters(chunk, criteria)
+        if filtered.empty:
+            return np.empty(0, dtype='int64'), np.empty(0), 0
+        ranked = filtered[~filtered.index.isin(excluded)]
+
+        if factor_columns:
+            # Same as calculate_scores with factors, already aligned by row
+            scores = (factors.loc[ranked.index] @ pd.Series(weights)[factors.columns]).round(2)
+        else:
+            scores = calculate_scores(ranked, weights)
+        scores = scores.nlargest(top_k)
+        return scores.index.to_numpy(dtype='int64'), scores.to_numpy(), len(filtered)
+    finally:
+        shm.close()
+
+
+def _excluded_listings(df: pd.DataFrame, criteria: Dict, prefer: str) -> np.ndarray:
+    """
+    Positions of passing listings that one_listing_per_issuer would drop.
+
+    Only issuers with several listings can lose one, so this filters just
+    those rows in-process.
+    """
+    rows = np.flatnonzero(df['ticker'].isin(ISSUER_OF).to_numpy())
+    listed = df.iloc[rows]
+    passing = filter_mask(listed, criteria).to_numpy() if criteria else np.ones(len(rows), dtype=bool)
+    keep = one_listing_per_issuer(listed[passing], prefer).to_numpy()
+    return rows[passing][~keep]
+
+
+def parallel_rank(
+    df: pd.DataFrame,
+    criteria: Dict,
+    style: Union[str, Dict[str, float]],
+    top_n: int = 20,
+    max_workers: Optional[int] = None,
+    min_rows: int = PARALLEL_MIN_ROWS,
+    factors: Optional[pd.DataFrame] = None,
+    one_per_issuer: Optional[str] = None,
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Apply filters and rank candidates across a process pool.
+
+    The frame is copied once into a shared-memory block; each worker
+    filters and scores its own row range and returns only its top_n rows,
+    which are merged here. Workers get the style's weights rather than its
+    name, so styles registered in this process work too.
+
+    Args:
+        df: DataFrame with stock data
+        criteria: Dictionary with filter criteria (as for apply_filters)
+        style: Investing style (name or weights dict)
+        top_n: Number of candidates to return
+        max_workers: Number of processes (defaults to the CPU count)
+        min_rows: Frames smaller than this are ranked in-process
+        factors: Optional precomputed factor scores (as for rank_candidates)
+        one_per_issuer: Keep one listing per issuer (as for rank_candidates)
+
+    Returns:
+        Tuple of (ranked top-N DataFrame, number of rows that passed filters)
+    """
+    if df.empty:
+        return df, 0
+
+    weights = style_weights(style)
+    workers = max_workers or os.cpu_count() or 1
+    if len(df) < min_rows or workers < 2:
+        filtered = apply_filters(df, criteria)
+        return rank_candidates(filtered, weights, top_n, factors, one_per_issuer), len(filtered)
+
+    extra = {}
+    if factors is not None:
+        # Align to rows the way calculate_scores does: unknown tickers score 0
+        rows = factors.index.get_indexer(df['ticker'])
+        values = factors.to_numpy(dtype='float64')
+        for i, name in enumerate(factors.columns):
+            extra[_FACTOR_PREFIX + name] = np.where(rows >= 0, values[rows, i], 0.0)
+    excluded = (_excluded_listings(df, criteria, one_per_issuer) if one_per_issuer
+                else np.empty(0, dtype='int64'))
+
+    # Text columns the criteria read (e.g. ticker in an expression) travel too
+    referenced = set().union(*(criterion_columns(key, value) for key, value in criteria.items()))
+    shm, shape, columns, categories = _pack_frame(df, sorted(referenced), extra)
+    try:
+        bounds = np.linspace(0, len(df), workers + 1, dtype='int64')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_screen_chunk, shm.name, shape, columns, categories,
+                                int(start), int(stop), criteria, weights, top_n,
+                                excluded[(excluded >= start) & (excluded < stop)])
+                for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    positions = np.concatenate([r[0] for r in results])
+    scores = np.concatenate([r[1] for r in results])
+    passed = sum(r[2] for r in results)
+
+    # Merge per-chunk winners; stable sort keeps ties in frame order
+    order = np.argsort(-scores, kind='stable')[:top_n]
+    ranked = df.iloc[positions[order]].copy()
+    ranked['score'] = scores[order]
+    return ranked, passed
@@ -0,0 +1,115 @@
+"""
+Peer-Relative Scoring Module
+Scores each factor against a stock's sector or industry peers (percentile
+rank or z-score) instead of the fixed cutoffs, in one grouped pass over the
+universe, cached per snapshot and shared by every screen and style.
+"""
+
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from screener import STYLE_WEIGHTS
+
+PEER_GROUPS = ('sector', 'industry')
+PEER_METHODS = ('percentile', 'zscore')
+
+# Groups with fewer members are pooled together rather than ranked alone
+MIN_PEERS = 5
+
+# z-scores are clipped to +/- this many standard deviations and mapped to 0-100
+ZSCORE_RANGE = 2.0
+
+_lock = threading.Lock()
+_cache: Dict[tuple, pd.DataFrame] = {}
+
+
+def peer_inputs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Raw per-factor values where higher is better (same factors as STYLE_WEIGHTS).
+
+    Upside, growth and yield are used as is; analyst rating is inverted
+    (1 = Strong Buy is best) and value uses earnings yield (1 / P/E), so
+    loss-makers have no value input.
+    """
+    def column(name):
+        if name in df:
+            return pd.to_numeric(df[name], errors='coerce')
+        return pd.Series(np.nan, index=df.index)
+
+    pe = column('pe_ratio')
+    return pd.DataFrame({
+        'upside': column('upside_pct'),
+        'analyst': -column('recommendation_mean'),
+        'revenue_growth': column('revenue_growth'),
+        'earnings_growth': column('earnings_growth'),
+        'dividend': column('dividend_yield'),
+        'value': 1 / pe.where(pe > 0),
+    }, index=df.index)[list(STYLE_WEIGHTS['blend'])]
+
+
+def _peer_keys(df: pd.DataFrame, group: str) -> pd.Series:
+    keys = df[group].fillna('Unknown').astype(str) if group in df else pd.Series('Unknown', index=df.index)
+    sizes = keys.map(keys.value_counts())
+    return keys.where(sizes >= MIN_PEERS, '(small groups)')
+
+
+def peer_factor_scores(
+    universe: pd.DataFrame,
+    group: str = 'sector',
+    method: str = 'percentile',
+    version: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    0-100 factor scores relative to each stock's peer group.
+
+    Args:
+        universe: Full snapshot (not the filtered frame), so peers don't
+            change with the screen's criteria
+        group: 'sector' or 'industry'
+        method: 'percentile' (share of peers beaten) or 'zscore'
+            (standard deviations from the peer mean, +/-2 mapped to 0-100)
+        version: Snapshot version; when given the result is cached and
+            reused for every screen and style on that snapshot
+
+    Returns:
+        DataFrame indexed by ticker with one column per STYLE_WEIGHTS
+        factor; missing inputs score 0, as in factor_scores
+    """
+    if group not in PEER_GROUPS:
+        raise ValueError(f"Unknown peer group {group!r}; choose from {PEER_GROUPS}")
+    if method not in PEER_METHODS:
+        raise ValueError(f"Unknown method {method!r}; choose from {PEER_METHODS}")
+
+    key = (version, group, method)
+    if version is not None:
+        with _lock:
+            cached = _cache.get(key)
+        if cached is not None:
+            return cached
+
+    inputs = peer_inputs(universe)
+    grouped = inputs.groupby(_peer_keys(universe, group).to_numpy())
+    if method == 'percentile':
+        scores = grouped.rank(pct=True) * 100
+    else:
+        mean = grouped.transform('mean')
+        std = grouped.transform('std')
+        z = ((inputs - mean) / std.where(std > 0)).clip(-ZSCORE_RANGE, ZSCORE_RANGE)
+        # A lone value or a group with no spread sits in the middle
+        z = z.where(std > 0, 0.0).where(inputs.notna())
+        scores = (z + ZSCORE_RANGE) / (2 * ZSCORE_RANGE) * 100
+
+    scores = scores.fillna(0.0)
+    scores.index = pd.Index(universe['ticker'], name='ticker')
+    scores = scores[~scores.index.duplicated(keep='last')]
+
+    if version is not None:
+        with _lock:
+            # Only the current snapshot (a few group/method pairs) is worth keeping
+            for stale in [k for k in _cache if k[0] != version]:
+                del _cache[stale]
+            _cache[key] = scores
+    return scores
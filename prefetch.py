@@ -0,0 +1,144 @@
+"""
+Prefetch Module
+Warms the refresh cache in the background for the tickers a screen is about
+to need, before the user asks for it. One small worker pool is shared by
+every session, each ticker is queued at most once, and a session's queued
+work is cancelled when its selection changes.
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Set
+
+from http_session import get_session
+from issuers import split_listings
+from refresh import QUOTE_TTL, refresh_ticker
+
+# Background fetches at a time, across all sessions (kept below the
+# foreground pool so a screen in progress isn't starved)
+PREFETCH_WORKERS = 4
+
+# Tickers queued at a time, across all sessions
+MAX_PENDING = 1000
+
+# The same selection from the same session is not re-queued within this window
+PREFETCH_COOLDOWN = QUOTE_TTL
+
+_lock = threading.Lock()
+_executor = None
+_pending: Dict[str, Future] = {}
+_wanted: Dict[str, Set[str]] = {}
+_owners: Dict[str, Dict] = {}
+_stats = {'requests': 0, 'queued': 0, 'shared': 0, 'dropped': 0, 'cancelled': 0, 'fetched': 0}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix='prefetch')
+    return _executor
+
+
+def _prefetch_one(ticker: str, shared: bool):
+    try:
+        refresh_ticker(ticker, get_session(), shared=shared)
+    except Exception:
+        pass
+    finally:
+        with _lock:
+            _pending.pop(ticker, None)
+            _wanted.pop(ticker, None)
+            _stats['fetched'] += 1
+
+
+def _cancel(owner: str):
+    """Withdraw an owner's queued tickers; ones another owner still wants stay queued."""
+    job = _owners.get(owner)
+    if job is None:
+        return
+    tickers, job['tickers'] = job['tickers'], []
+    for ticker in tickers:
+        wanted = _wanted.get(ticker)
+        if wanted is None:
+            continue
+        wanted.discard(owner)
+        if not wanted and _pending[ticker].cancel():
+            del _pending[ticker]
+            del _wanted[ticker]
+            _stats['cancelled'] += 1
+
+
+def request_prefetch(owner: str, tickers: List[str]) -> int:
+    """
+    Queue a background refresh of tickers on behalf of owner (e.g. a session).
+
+    Replaces the owner's previous request: its tickers that haven't started
+    are cancelled unless another owner wants them too. Tickers already
+    queued by anyone are shared rather than queued twice, and repeating the
+    same request within PREFETCH_COOLDOWN does nothing.
+
+    Args:
+        owner: Id of the requester; one active request per owner
+        tickers: Tickers to warm, most wanted first
+
+    Returns:
+        Number of tickers newly queued
+    """
+    # Primary listings first, so a secondary listing's row can be built as soon as it lands
+    groups = split_listings(tickers)
+    secondary = {ticker for others in groups.values() for ticker in others}
+    order = list(groups) + [ticker for others in groups.values() for ticker in others]
+    key = hashlib.sha256('\n'.join(order).encode()).hexdigest()
+    now = time.time()
+
+    with _lock:
+        _stats['requests'] += 1
+        # Forget owners (e.g. closed sessions) that haven't asked for anything lately
+        for stale in [o for o, job in _owners.items() if o != owner and now - job['at'] >= PREFETCH_COOLDOWN]:
+            _cancel(stale)
+            del _owners[stale]
+
+        previous = _owners.get(owner)
+        if previous and previous['key'] == key and now - previous['at'] < PREFETCH_COOLDOWN:
+            return 0
+        _cancel(owner)
+
+        job = {'key': key, 'at': now, 'tickers': []}
+        _owners[owner] = job
+        queued = 0
+        for ticker in order:
+            if ticker in _pending:
+                _wanted[ticker].add(owner)
+                _stats['shared'] += 1
+            elif len(_pending) >= MAX_PENDING:
+                _stats['dropped'] += 1
+                continue
+            else:
+                _wanted[ticker] = {owner}
+                _pending[ticker] = _get_executor().submit(_prefetch_one, ticker, ticker in secondary)
+                queued += 1
+            job['tickers'].append(ticker)
+        _stats['queued'] += queued
+    return queued
+
+
+def cancel_prefetch(owner: str):
+    """
+    Cancel the owner's queued tickers (those already being fetched finish).
+
+    The request still counts for PREFETCH_COOLDOWN, so re-sending the same
+    selection right after (e.g. on the rerun after a screen) is a no-op.
+    """
+    with _lock:
+        _cancel(owner)
+
+
+def prefetch_stats() -> Dict:
+    """Counts of requests and of tickers queued, shared, dropped, cancelled and fetched."""
+    with _lock:
+        stats = dict(_stats)
+        stats['pending'] = len(_pending)
+        stats['owners'] = len(_owners)
+    return stats
@@ -0,0 +1,255 @@
+"""
+Tiered Refresh Module
+Keeps an in-process record per ticker and refreshes quote fields and
+fundamentals/analyst fields on separate schedules.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from fx import add_usd_columns
+from http_session import get_session
+from issuers import listing_row, split_listings
+from screener import fetch_single_stock, fetch_quote, add_derived_metrics
+
+# Fields that move minute to minute (refreshed via fast_info)
+QUOTE_FIELDS = [
+    'price', 'market_cap', 'fifty_two_week_high', 'fifty_two_week_low',
+    'fifty_day_avg', 'two_hundred_day_avg',
+]
+
+# Fields that change weekly/quarterly (refreshed via the full .info payload)
+FUNDAMENTAL_FIELDS = [
+    'name', 'target_price', 'pe_ratio', 'dividend_yield', 'payout_ratio',
+    'revenue_growth', 'earnings_growth', 'recommendation', 'recommendation_mean',
+    'num_analysts', 'sector', 'industry', 'most_recent_quarter', 'currency',
+]
+
+QUOTE_TTL = 5 * 60               # 5 minutes
+FUNDAMENTALS_TTL = 24 * 60 * 60  # 1 day
+
+# NYSE and TSX share the same regular session
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
+_lock = threading.Lock()
+_records: Dict[str, Dict] = {}
+# Tickers being fetched right now; concurrent refreshers wait instead of re-fetching
+_inflight: Dict[str, threading.Event] = {}
+_last_run = {'quote_fetches': 0, 'full_fetches': 0, 'cached': 0}
+
+
+def is_market_open(now: Optional[float] = None) -> bool:
+    """True during NYSE/TSX regular trading hours (holidays not considered)."""
+    local = datetime.fromtimestamp(now if now is not None else time.time(), MARKET_TZ)
+    if local.weekday() >= 5:
+        return False
+    opens = local.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    closes = local.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    return opens <= local < closes
+
+
+def last_market_close(now: Optional[float] = None) -> float:
+    """Timestamp of the most recent regular-session close at or before now."""
+    local = datetime.fromtimestamp(now if now is not None else time.time(), MARKET_TZ)
+    close = local.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    if close > local:
+        close -= timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= timedelta(days=1)
+    return close.timestamp()
+
+
+def _quote_is_stale(record: Dict, now: float, quote_ttl: float) -> bool:
+    if now - record['quote_as_of'] < quote_ttl:
+        return False
+    # Outside trading hours a quote taken after the last close is still current
+    return is_market_open(now) or record['quote_as_of'] < last_market_close(now)
+
+
+def _refresh_one(ticker: str, session, now: float, quote_ttl: float,
+                 fundamentals_ttl: float, shared: bool = False) -> Optional[str]:
+    """
+    Bring one ticker's record up to date; returns which call was made.
+
+    With shared=True the ticker is a secondary listing: only its quote is
+    kept, and its fundamentals come from the primary listing's record.
+    If another thread (a prefetch, another session) is already fetching
+    the ticker, wait for it and use its result.
+    """
+    with _lock:
+        event = _inflight.get(ticker)
+        if event is None:
+            _inflight[ticker] = threading.Event()
+    if event is not None:
+        event.wait()
+        with _lock:
+            record = _records.get(ticker)
+        if record is not None and not shared and 'fundamentals' not in record:
+            # That was a quote-only fetch; this caller needs the full record
+            return _refresh_one(ticker, session, now, quote_ttl, fundamentals_ttl, shared)
+        return 'cached' if record is not None else None
+
+    try:
+        return _fetch_one(ticker, session, now, quote_ttl, fundamentals_ttl, shared)
+    finally:
+        with _lock:
+            _inflight.pop(ticker).set()
+
+
+def _fetch_one(ticker: str, session, now: float, quote_ttl: float,
+               fundamentals_ttl: float, shared: bool) -> Optional[str]:
+    with _lock:
+        record = _records.get(ticker)
+
+    if shared:
+        if record is not None and not _quote_is_stale(record, now, quote_ttl):
+            return 'cached'
+        quote = fetch_quote(ticker, session)
+        if quote is None:
+            return 'cached' if record is not None else None
+        # Any fundamentals from when this listing was fetched as a primary are kept
+        record = dict(record or {})
+        record['quote'] = {field: quote[field] for field in QUOTE_FIELDS}
+        record['quote_as_of'] = now
+        call = 'quote'
+    elif record is None or 'fundamentals' not in record or now - record['fundamentals_as_of'] >= fundamentals_ttl:
+        data = fetch_single_stock(ticker, session)
+        if data is None:
+            return None
+        record = {
+            'quote': {field: data[field] for field in QUOTE_FIELDS},
+            'fundamentals': {field: data[field] for field in FUNDAMENTAL_FIELDS},
+            'quote_as_of': now,
+            'fundamentals_as_of': now,
+        }
+        call = 'full'
+    elif _quote_is_stale(record, now, quote_ttl):
+        quote = fetch_quote(ticker, session)
+        if quote is None:
+            # Keep serving the previous quote rather than dropping the ticker
+            return 'cached'
+        record = dict(record)
+        record['quote'] = {field: quote[field] for field in QUOTE_FIELDS}
+        record['quote_as_of'] = now
+        call = 'quote'
+    else:
+        return 'cached'
+
+    with _lock:
+        _records[ticker] = record
+    return call
+
+
+def refresh_ticker(
+    ticker: str,
+    session=None,
+    quote_ttl: float = QUOTE_TTL,
+    fundamentals_ttl: float = FUNDAMENTALS_TTL,
+    shared: bool = False,
+) -> Optional[str]:
+    """
+    Bring one listing's record up to date without building a frame (e.g. to prefetch).
+
+    Args:
+        shared: The ticker is a secondary listing (see issuers.split_listings)
+            whose fundamentals come from its primary, so only refresh its quote
+
+    Returns:
+        'full', 'quote' or 'cached', or None if the ticker has no data
+    """
+    return _refresh_one(ticker, session or get_session(), time.time(), quote_ttl, fundamentals_ttl, shared)
+
+
+def _merged_row(ticker: str, record: Dict, primary: Optional[str] = None) -> Optional[Dict]:
+    if primary is not None:
+        primary_record = _records.get(primary)
+        if primary_record is None or 'fundamentals' not in primary_record:
+            return None
+        return add_derived_metrics(listing_row(ticker, _merged_row(primary, primary_record), record['quote']))
+    if 'fundamentals' not in record:
+        return None
+    row = {'ticker': ticker}
+    row.update(record['fundamentals'])
+    row.update(record['quote'])
+    return add_derived_metrics(row)
+
+
+def refresh_stock_data(
+    tickers: List[str],
+    max_workers: int = 10,
+    quote_ttl: float = QUOTE_TTL,
+    fundamentals_ttl: float = FUNDAMENTALS_TTL,
+) -> pd.DataFrame:
+    """
+    Fetch stock data, only re-requesting field groups that have gone stale.
+
+    Share classes and cross-listings of one issuer (see issuers.py) share
+    the primary listing's fundamentals; the others only refresh quotes.
+
+    Args:
+        tickers: List of stock tickers
+        max_workers: Number of parallel threads
+        quote_ttl: Seconds before price/market-cap fields are re-fetched
+            (only during trading hours, or if older than the last close)
+        fundamentals_ttl: Seconds before target/analyst/growth/sector
+            fields are re-fetched
+
+    Returns:
+        DataFrame with the same columns as fetch_stock_data, with
+        upside_pct and pct_from_high recomputed from the merged record,
+        plus currency, fx_to_usd, price_usd and market_cap_usd
+    """
+    now = time.time()
+    counts = {'quote': 0, 'full': 0, 'cached': 0}
+    session = get_session(pool_size=max_workers)
+
+    groups = split_listings(tickers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_refresh_one, primary, session, now, quote_ttl, fundamentals_ttl)
+            for primary in groups
+        ] + [
+            executor.submit(_refresh_one, ticker, session, now, quote_ttl, fundamentals_ttl, True)
+            for others in groups.values() for ticker in others
+        ]
+        for future in as_completed(futures):
+            call = future.result()
+            if call:
+                counts[call] += 1
+
+    with _lock:
+        _last_run.update(
+            quote_fetches=counts['quote'],
+            full_fetches=counts['full'],
+            cached=counts['cached'],
+        )
+        primary_of = {ticker: primary for primary, others in groups.items() for ticker in others}
+        rows = [_merged_row(t, _records[t], primary_of.get(t)) for t in dict.fromkeys(tickers) if t in _records]
+        rows = [row for row in rows if row is not None]
+
+    if not rows:
+        return pd.DataFrame()
+
+    return add_usd_columns(pd.DataFrame(rows))
+
+
+def refresh_stats() -> Dict:
+    """Return how many quote, full and cache-only lookups the last refresh made."""
+    with _lock:
+        stats = dict(_last_run)
+        stats['tracked_tickers'] = len(_records)
+    return stats
+
+
+def clear_records():
+    """Forget every cached record so the next refresh fetches everything."""
+    with _lock:
+        _records.clear()
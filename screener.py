@@ -5,17 +5,22 @@ Fetches stock data from yfinance and applies screening criteria.
 
 import yfinance as yf
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Union
 import warnings
 
+from expressions import compile_expression
+from http_session import get_session
+from issuers import listing_row, one_listing_per_issuer, split_listings
+
 warnings.filterwarnings('ignore')
 
 
-def fetch_single_stock(ticker: str) -> Optional[Dict]:
-    """Fetch data for a single stock."""
+def fetch_single_stock(ticker: str, session=None) -> Optional[Dict]:
+    """Fetch data for a single stock using the shared pooled session."""
     try:
-        stock = yf.Ticker(ticker)
+        stock = yf.Ticker(ticker, session=session or get_session())
         info = stock.info
         
         # Skip if no valid data
@@ -43,29 +48,71 @@ def fetch_single_stock(ticker: str) -> Optional[Dict]:
             'two_hundred_day_avg': info.get('twoHundredDayAverage', 0),
             'sector': info.get('sector', 'Unknown'),
             'industry': info.get('industry', 'Unknown'),
+            'most_recent_quarter': info.get('mostRecentQuarter', None),  # epoch seconds
+            'currency': info.get('currency', None),  # price/market cap currency
         }
         
-        # Calculate derived metrics
-        if data['price'] and data['target_price']:
-            data['upside_pct'] = ((data['target_price'] - data['price']) / data['price']) * 100
-        else:
-            data['upside_pct'] = None
-            
-        if data['price'] and data['fifty_two_week_high']:
-            data['pct_from_high'] = ((data['price'] - data['fifty_two_week_high']) / data['fifty_two_week_high']) * 100
-        else:
-            data['pct_from_high'] = None
-            
-        return data
+        return add_derived_metrics(data)
         
     except Exception as e:
         return None
 
 
+def fetch_quote(ticker: str, session=None) -> Optional[Dict]:
+    """
+    Fetch only the fast-moving quote fields for a single stock.
+    
+    Uses yfinance's fast_info instead of the full .info payload: a 1-year
+    chart request (price, 52-week range, moving averages) plus a
+    shares-outstanding request for the market cap, and a fallback to .info
+    when Yahoo has no share count. That is cheaper than the quoteSummary
+    modules behind .info, but still at least two requests per ticker.
+    """
+    try:
+        stock = yf.Ticker(ticker, session=session or get_session())
+        fast = stock.fast_info
+        
+        price = fast['lastPrice']
+        if not price:
+            return None
+        
+        return {
+            'ticker': ticker,
+            'price': price,
+            'market_cap': fast['marketCap'] or 0,
+            'fifty_two_week_high': fast['yearHigh'] or 0,
+            'fifty_two_week_low': fast['yearLow'] or 0,
+            'fifty_day_avg': fast['fiftyDayAverage'] or 0,
+            'two_hundred_day_avg': fast['twoHundredDayAverage'] or 0,
+        }
+        
+    except Exception as e:
+        return None
+
+
+def add_derived_metrics(data: Dict) -> Dict:
+    """Compute upside_pct and pct_from_high from price, target and 52w high."""
+    if data.get('price') and data.get('target_price'):
+        data['upside_pct'] = ((data['target_price'] - data['price']) / data['price']) * 100
+    else:
+        data['upside_pct'] = None
+        
+    if data.get('price') and data.get('fifty_two_week_high'):
+        data['pct_from_high'] = ((data['price'] - data['fifty_two_week_high']) / data['fifty_two_week_high']) * 100
+    else:
+        data['pct_from_high'] = None
+    
+    return data
+
+
 def fetch_stock_data(tickers: List[str], max_workers: int = 10) -> pd.DataFrame:
     """
     Fetch stock data for multiple tickers in parallel.
     
+    Share classes and cross-listings of one issuer (see issuers.py) share a
+    single full fetch of the primary listing; the other listings only
+    fetch their quote.
+    
     Args:
         tickers: List of stock tickers
         max_workers: Number of parallel threads
@@ -74,14 +121,29 @@ def fetch_stock_data(tickers: List[str], max_workers: int = 10) -> pd.DataFrame:
         DataFrame with stock data
     """
     results = []
+    groups = split_listings(tickers)
+    requested = set(tickers)
+    
+    # One keep-alive pool for every worker, reused across screens
+    session = get_session(pool_size=max_workers)
     
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_ticker = {executor.submit(fetch_single_stock, ticker): ticker for ticker in tickers}
+        full = {primary: executor.submit(fetch_single_stock, primary, session) for primary in groups}
+        quotes = {
+            ticker: executor.submit(fetch_quote, ticker, session)
+            for others in groups.values() for ticker in others
+        }
         
-        for future in as_completed(future_to_ticker):
-            result = future.result()
-            if result:
-                results.append(result)
+        for primary, others in groups.items():
+            row = full[primary].result()
+            if row is None:
+                continue
+            if primary in requested:
+                results.append(row)
+            for ticker in others:
+                quote = quotes[ticker].result()
+                if quote:
+                    results.append(add_derived_metrics(listing_row(ticker, row, quote)))
     
     if not results:
         return pd.DataFrame()
@@ -89,46 +151,167 @@ def fetch_stock_data(tickers: List[str], max_workers: int = 10) -> pd.DataFrame:
     return pd.DataFrame(results)
 
 
-def apply_filters(df: pd.DataFrame, criteria: Dict) -> pd.DataFrame:
+def criterion_mask(df: pd.DataFrame, key: str, value) -> Optional[pd.Series]:
     """
-    Apply user-selected filters to the stock data.
+    Evaluate a single filter criterion.
     
     Args:
         df: DataFrame with stock data
-        criteria: Dictionary with filter criteria
+        key: Criteria key (e.g. 'sectors', 'min_market_cap')
+        value: Criteria value
         
     Returns:
-        Filtered DataFrame
+        Boolean Series aligned with df, or None if the criterion is
+        inactive (unset/zero) or unknown
     """
-    if df.empty:
-        return df
-    
-    filtered = df.copy()
-    
     # Sector filter
-    if criteria.get('sectors') and len(criteria['sectors']) > 0:
-        filtered = filtered[filtered['sector'].isin(criteria['sectors'])]
+    if key == 'sectors':
+        if value and len(value) > 0:
+            return df['sector'].isin(value)
     
-    # Market cap filter (risk tolerance)
-    if criteria.get('min_market_cap'):
-        filtered = filtered[filtered['market_cap'] >= criteria['min_market_cap']]
-    if criteria.get('max_market_cap'):
-        filtered = filtered[filtered['market_cap'] <= criteria['max_market_cap']]
+    # Market cap filter (risk tolerance); thresholds are USD, so use the
+    # FX-normalized column when the frame has one (see fx.add_usd_columns)
+    elif key == 'min_market_cap':
+        if value:
+            return df['market_cap_usd' if 'market_cap_usd' in df else 'market_cap'] >= value
+    elif key == 'max_market_cap':
+        if value:
+            return df['market_cap_usd' if 'market_cap_usd' in df else 'market_cap'] <= value
     
     # Minimum analyst coverage
-    if criteria.get('min_analysts', 0) > 0:
-        filtered = filtered[filtered['num_analysts'] >= criteria['min_analysts']]
+    elif key == 'min_analysts':
+        if value and value > 0:
+            return df['num_analysts'] >= value
     
     # Minimum upside
-    if criteria.get('min_upside'):
-        filtered = filtered[filtered['upside_pct'].notna() & (filtered['upside_pct'] >= criteria['min_upside'])]
+    elif key == 'min_upside':
+        if value:
+            return df['upside_pct'].notna() & (df['upside_pct'] >= value)
     
     # Only buy/strong buy ratings
-    if criteria.get('buy_ratings_only'):
-        buy_ratings = ['buy', 'strong_buy', 'strongBuy', 'outperform']
-        filtered = filtered[filtered['recommendation'].str.lower().isin(buy_ratings)]
+    elif key == 'buy_ratings_only':
+        if value:
+            buy_ratings = ['buy', 'strong_buy', 'strongBuy', 'outperform']
+            return df['recommendation'].str.lower().isin(buy_ratings)
+    
+    # Free-form screen expression (see expressions.py)
+    elif key == 'expression':
+        if value and value.strip():
+            return compile_expression(value)(df)
     
-    return filtered
+    return None
+
+
+def criterion_columns(key: str, value) -> set:
+    """Columns criterion_mask reads for a criterion (empty if it is inactive or unknown)."""
+    if not value:
+        return set()
+    if key == 'sectors':
+        return {'sector'}
+    if key in ('min_market_cap', 'max_market_cap'):
+        return {'market_cap', 'market_cap_usd'}
+    if key == 'min_analysts':
+        return {'num_analysts'}
+    if key == 'min_upside':
+        return {'upside_pct'}
+    if key == 'buy_ratings_only':
+        return {'recommendation'}
+    if key == 'expression' and value.strip():
+        return set(compile_expression(value).columns)
+    return set()
+
+
+def filter_mask(df: pd.DataFrame, criteria: Dict) -> pd.Series:
+    """Boolean Series marking the rows of df that pass every criterion."""
+    mask = pd.Series(True, index=df.index)
+    for key, value in criteria.items():
+        condition = criterion_mask(df, key, value)
+        if condition is not None:
+            mask &= condition
+    return mask
+
+
+def apply_filters(df: pd.DataFrame, criteria: Dict) -> pd.DataFrame:
+    """
+    Apply user-selected filters to the stock data.
+    
+    Args:
+        df: DataFrame with stock data
+        criteria: Dictionary with filter criteria
+        
+    Returns:
+        Filtered DataFrame
+    """
+    if df.empty:
+        return df
+    
+    return df[filter_mask(df, criteria)].copy()
+
+
+# Factor weights for each investing style (mirrors the README table)
+STYLE_WEIGHTS = {
+    'growth': {
+        'upside': 0.25,
+        'analyst': 0.20,
+        'revenue_growth': 0.35,
+        'earnings_growth': 0.15,
+        'dividend': 0.0,
+        'value': 0.05,
+    },
+    'value': {
+        'upside': 0.40,
+        'analyst': 0.20,
+        'revenue_growth': 0.05,
+        'earnings_growth': 0.05,
+        'dividend': 0.10,
+        'value': 0.20,
+    },
+    'dividend': {
+        'upside': 0.15,
+        'analyst': 0.15,
+        'revenue_growth': 0.05,
+        'earnings_growth': 0.05,
+        'dividend': 0.40,
+        'value': 0.20,
+    },
+    'blend': {
+        'upside': 0.25,
+        'analyst': 0.20,
+        'revenue_growth': 0.15,
+        'earnings_growth': 0.10,
+        'dividend': 0.15,
+        'value': 0.15,
+    },
+}
+
+# Styles that ship with the screener; register_style can't replace them
+BUILTIN_STYLES = tuple(STYLE_WEIGHTS)
+
+
+def register_style(name: str, weights: Dict[str, float]) -> Dict[str, float]:
+    """
+    Add (or replace) a custom style usable by rank_candidates.
+    
+    Args:
+        name: Style name (stored lowercase); can't be a built-in style
+        weights: Weight per factor; must cover exactly the STYLE_WEIGHTS
+            factors and is normalized to sum to 1
+        
+    Returns:
+        The normalized weights that were registered
+    """
+    if name.lower() in BUILTIN_STYLES:
+        raise ValueError(f"{name!r} is a built-in style; choose another name")
+    factors = set(STYLE_WEIGHTS['blend'])
+    if set(weights) != factors:
+        raise ValueError(f"Style weights must have exactly these factors: {sorted(factors)}")
+    total = sum(weights.values())
+    if total <= 0 or any(w < 0 for w in weights.values()):
+        raise ValueError("Style weights must be non-negative with a positive sum")
+    
+    normalized = {factor: weights[factor] / total for factor in STYLE_WEIGHTS['blend']}
+    STYLE_WEIGHTS[name.lower()] = normalized
+    return normalized
 
 
 def calculate_score(stock: pd.Series, style: str) -> float:
@@ -144,43 +327,7 @@ def calculate_score(stock: pd.Series, style: str) -> float:
     """
     score = 0.0
     
-    # Define weights based on style
-    weights = {
-        'growth': {
-            'upside': 0.25,
-            'analyst': 0.20,
-            'revenue_growth': 0.35,
-            'earnings_growth': 0.15,
-            'dividend': 0.0,
-            'value': 0.05,
-        },
-        'value': {
-            'upside': 0.40,
-            'analyst': 0.20,
-            'revenue_growth': 0.05,
-            'earnings_growth': 0.05,
-            'dividend': 0.10,
-            'value': 0.20,
-        },
-        'dividend': {
-            'upside': 0.15,
-            'analyst': 0.15,
-            'revenue_growth': 0.05,
-            'earnings_growth': 0.05,
-            'dividend': 0.40,
-            'value': 0.20,
-        },
-        'blend': {
-            'upside': 0.25,
-            'analyst': 0.20,
-            'revenue_growth': 0.15,
-            'earnings_growth': 0.10,
-            'dividend': 0.15,
-            'value': 0.15,
-        },
-    }
-    
-    w = weights.get(style.lower(), weights['blend'])
+    w = STYLE_WEIGHTS.get(style.lower(), STYLE_WEIGHTS['blend'])
     
     # Upside score (0-100 scale, capped at 50% upside)
     if stock.get('upside_pct') is not None:
@@ -220,14 +367,102 @@ def calculate_score(stock: pd.Series, style: str) -> float:
     return round(score, 2)
 
 
-def rank_candidates(df: pd.DataFrame, style: str, top_n: int = 20) -> pd.DataFrame:
+# Columns factor_scores reads
+SCORE_INPUTS = [
+    'upside_pct', 'recommendation_mean', 'revenue_growth', 'earnings_growth',
+    'dividend_yield', 'pe_ratio',
+]
+
+
+def factor_scores(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized version of the per-factor scoring in calculate_score.
+    
+    Args:
+        df: DataFrame with stock data
+        
+    Returns:
+        DataFrame (same index) with one 0-100 column per STYLE_WEIGHTS factor;
+        missing inputs score 0, as they contribute nothing in calculate_score
+    """
+    def column(name):
+        if name in df:
+            return pd.to_numeric(df[name], errors='coerce')
+        return pd.Series(float('nan'), index=df.index)
+    
+    pe = column('pe_ratio')
+    
+    scores = pd.DataFrame({
+        'upside': (column('upside_pct') * 2).clip(0, 100),
+        'analyst': ((5 - column('recommendation_mean')) * 25).clip(0, 100),
+        'revenue_growth': (column('revenue_growth') * 200).clip(0, 100),
+        'earnings_growth': (column('earnings_growth') * 200).clip(0, 100),
+        'dividend': (column('dividend_yield') * 100 * 20).clip(upper=100),
+        'value': (1000 / pe.where(pe > 0)).clip(upper=100),
+    }, index=df.index)
+    
+    return scores.fillna(0.0)
+
+
+def style_weights(style: Union[str, Dict[str, float]]) -> Dict[str, float]:
+    """
+    Factor weights for a style.
+    
+    Args:
+        style: Style name (unknown names fall back to 'blend'), or a weights
+            dict, which is returned as-is
+        
+    Returns:
+        Weight per factor
+    """
+    if isinstance(style, dict):
+        return style
+    return STYLE_WEIGHTS.get(style.lower(), STYLE_WEIGHTS['blend'])
+
+
+def calculate_scores(df: pd.DataFrame, style: Union[str, Dict[str, float]],
+                     factors: Optional[pd.DataFrame] = None) -> pd.Series:
+    """
+    Calculate composite scores for every row at once.
+    
+    Args:
+        df: DataFrame with stock data
+        style: Style name (e.g. 'growth', 'value', 'dividend', 'blend' or a
+            registered one) or its weights dict (see style_weights)
+        factors: Precomputed 0-100 factor scores indexed by ticker (e.g.
+            peers.peer_factor_scores) to use instead of the fixed cutoffs
+        
+    Returns:
+        Series of composite scores aligned with df
+    """
+    w = style_weights(style)
+    if factors is None:
+        factors = factor_scores(df)
+        weights = pd.Series(w)[factors.columns]
+        return (factors @ weights).round(2)
+    
+    # Look rows up by ticker; tickers without precomputed scores get 0
+    rows = factors.index.get_indexer(df['ticker'])
+    weighted = factors.to_numpy() @ pd.Series(w)[factors.columns].to_numpy()
+    scores = np.where(rows >= 0, weighted[rows], 0.0)
+    return pd.Series(scores, index=df.index).round(2)
+
+
+def rank_candidates(df: pd.DataFrame, style: Union[str, Dict[str, float]], top_n: int = 20,
+                    factors: Optional[pd.DataFrame] = None,
+                    one_per_issuer: Optional[str] = None) -> pd.DataFrame:
     """
     Rank stocks by composite score and return top candidates.
     
     Args:
         df: Filtered DataFrame
-        style: Investing style
+        style: Investing style (name or weights dict, see style_weights)
         top_n: Number of candidates to return
+        factors: Optional precomputed factor scores (see calculate_scores),
+            e.g. for sector-relative scoring
+        one_per_issuer: Keep one listing per issuer: 'liquid' (most liquid
+            listing) or 'cad' (TSX listing when there is one); None keeps
+            every listing
         
     Returns:
         Ranked DataFrame with top candidates
@@ -235,15 +470,16 @@ def rank_candidates(df: pd.DataFrame, style: str, top_n: int = 20) -> pd.DataFra
     if df.empty:
         return df
     
-    # Calculate scores
-    df = df.copy()
-    df['score'] = df.apply(lambda row: calculate_score(row, style), axis=1)
+    if one_per_issuer:
+        df = df[one_listing_per_issuer(df, one_per_issuer)]
     
-    # Sort by score descending
-    df = df.sort_values('score', ascending=False)
+    # Calculate scores and keep only the top N rows (by position)
+    scores = calculate_scores(df, style, factors).reset_index(drop=True)
+    top = scores.nlargest(top_n).index
     
-    # Return top N
-    return df.head(top_n)
+    ranked = df.iloc[top].copy()
+    ranked['score'] = scores.iloc[top].to_numpy()
+    return ranked
 
 
 def get_signal(row: pd.Series) -> str:
@@ -275,6 +511,42 @@ def get_signal(row: pd.Series) -> str:
     return " | ".join(signals) if signals else "—"
 
 
+def get_signals(df: pd.DataFrame) -> pd.Series:
+    """
+    Vectorized get_signal for a whole result set.
+
+    Args:
+        df: DataFrame with upside_pct, recommendation and pct_from_high
+
+    Returns:
+        Series of signal strings aligned with df
+    """
+    missing = pd.Series(np.nan, index=df.index)
+    upside = pd.to_numeric(df.get('upside_pct', missing), errors='coerce')
+    rec = df.get('recommendation', missing).fillna('').astype(str).str.lower()
+    from_high = pd.to_numeric(df.get('pct_from_high', missing), errors='coerce')
+
+    parts = [
+        np.select(
+            [upside >= 20, upside >= 10, upside <= -10],
+            ["🚀 Strong Upside", "✅ Undervalued", "⚠️ Overvalued"],
+            default='',
+        ),
+        np.select(
+            [rec.isin(['strong_buy', 'strongbuy']), rec == 'buy', rec == 'sell'],
+            ["💪 Strong Buy", "👍 Buy", "👎 Sell"],
+            default='',
+        ),
+        np.where(from_high <= -30, "📉 Near 52w Low", ''),
+    ]
+
+    signals = parts[0].astype(object)
+    for part in parts[1:]:
+        part = part.astype(object)
+        signals = np.where(signals == '', part, np.where(part == '', signals, signals + " | " + part))
+    return pd.Series(np.where(signals == '', "—", signals), index=df.index)
+
+
 def format_market_cap(value: float) -> str:
     """Format market cap in billions/millions."""
     if value >= 1e12:
@@ -0,0 +1,248 @@
+"""
+Snapshot Module
+Persists each fetched universe as a versioned snapshot (kept apart per
+universe, e.g. US vs TSX) and diffs consecutive snapshots by ticker.
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from screener import apply_filters, rank_candidates
+
+# Local storage root shared by everything that persists state between runs
+DATA_DIR = Path(os.environ.get('INVESTSCOUT_HOME', Path.home() / '.investscout'))
+SNAPSHOT_DIR = DATA_DIR / 'snapshots'
+
+# Universe (see data/universes.py) used when none is given; each universe's
+# snapshots live in their own subdirectory of SNAPSHOT_DIR
+DEFAULT_UNIVERSE = 'all'
+
+# Retention: the most recent snapshots are all kept; older ones are thinned
+# to the last one of each day (enough for backtest.load_history). Daily
+# snapshots are kept indefinitely unless a day limit is set
+SNAPSHOT_KEEP_RECENT = 20
+SNAPSHOT_KEEP_DAYS: Optional[int] = None
+
+# Fields compared by default (quote noise like 50-day averages is left out)
+DIFF_FIELDS = [
+    'price', 'target_price', 'recommendation', 'recommendation_mean',
+    'num_analysts', 'market_cap', 'pe_ratio', 'dividend_yield',
+    'revenue_growth', 'earnings_growth', 'sector',
+]
+
+CHANGE_COLUMNS = ['ticker', 'field', 'old', 'new', 'change']
+
+
+def universe_dir(universe: str = DEFAULT_UNIVERSE, snapshot_dir: Optional[Path] = None) -> Path:
+    """Directory holding a universe's snapshots."""
+    if not re.fullmatch(r'[A-Za-z0-9_-]+', universe):
+        raise ValueError(f"Invalid universe key {universe!r}")
+    return Path(snapshot_dir or SNAPSHOT_DIR) / universe
+
+
+def save_snapshot(df: pd.DataFrame, snapshot_dir: Optional[Path] = None,
+                  universe: str = DEFAULT_UNIVERSE) -> str:
+    """
+    Store a fetched universe and return its version id.
+
+    Version ids are zero-padded millisecond timestamps, so they sort in
+    the order the snapshots were taken. Older snapshots of the same
+    universe are pruned (see prune_snapshots) after each save.
+    """
+    directory = universe_dir(universe, snapshot_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    version = f"{int(time.time() * 1000):015d}"
+    tmp = directory / f"{version}.pkl.tmp"
+    df.to_pickle(tmp)
+    tmp.replace(directory / f"{version}.pkl")
+    prune_snapshots(snapshot_dir=snapshot_dir, universe=universe)
+    return version
+
+
+def prune_snapshots(
+    keep_recent: int = SNAPSHOT_KEEP_RECENT,
+    keep_days: Optional[int] = SNAPSHOT_KEEP_DAYS,
+    snapshot_dir: Optional[Path] = None,
+    now: Optional[float] = None,
+    universe: str = DEFAULT_UNIVERSE,
+) -> List[str]:
+    """
+    Delete snapshots outside the retention policy.
+
+    Args:
+        keep_recent: Newest snapshots always kept
+        keep_days: Beyond those, the last snapshot of each (UTC) day is kept
+            for this many days (None keeps them all); everything else is
+            deleted
+        snapshot_dir: Snapshot root directory
+        now: Current time (seconds), for testing
+        universe: Universe whose snapshots are pruned
+
+    Returns:
+        Versions deleted
+    """
+    directory = universe_dir(universe, snapshot_dir)
+    versions = list_snapshots(snapshot_dir, universe)
+    older = versions[:-keep_recent] if keep_recent > 0 else versions
+    if keep_days is None:
+        cutoff_ms = float('-inf')
+    else:
+        cutoff_ms = ((now if now is not None else time.time()) - keep_days * 86400) * 1000
+
+    kept_days = set()
+    deleted = []
+    # Newest first, so the day's last snapshot is the one kept
+    for version in reversed(older):
+        day = int(version) // 86_400_000
+        if int(version) >= cutoff_ms and day not in kept_days:
+            kept_days.add(day)
+            continue
+        (directory / f"{version}.pkl").unlink(missing_ok=True)
+        deleted.append(version)
+    return deleted
+
+
+def list_snapshots(snapshot_dir: Optional[Path] = None, universe: str = DEFAULT_UNIVERSE) -> List[str]:
+    """Return a universe's stored snapshot versions, oldest first."""
+    directory = universe_dir(universe, snapshot_dir)
+    if not directory.exists():
+        return []
+    return sorted(p.name[:-len('.pkl')] for p in directory.glob('*.pkl'))
+
+
+def load_snapshot(version: Optional[str] = None, snapshot_dir: Optional[Path] = None,
+                  universe: str = DEFAULT_UNIVERSE) -> pd.DataFrame:
+    """Load a universe's snapshot by version (latest if omitted); empty if none exist."""
+    if version is None:
+        versions = list_snapshots(snapshot_dir, universe)
+        if not versions:
+            return pd.DataFrame()
+        version = versions[-1]
+    return pd.read_pickle(universe_dir(universe, snapshot_dir) / f"{version}.pkl")
+
+
+def _by_ticker(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty or 'ticker' not in df:
+        return pd.DataFrame(index=pd.Index([], name='ticker'))
+    return df.drop_duplicates('ticker', keep='last').set_index('ticker')
+
+
+def diff_snapshots(
+    old: pd.DataFrame,
+    new: pd.DataFrame,
+    fields: Optional[List[str]] = None,
+    rtol: float = 0.0,
+) -> pd.DataFrame:
+    """
+    Compare two snapshots by ticker and return what changed.
+
+    Args:
+        old: Previous snapshot
+        new: Current snapshot
+        fields: Columns to compare (defaults to DIFF_FIELDS)
+        rtol: Relative tolerance below which numeric changes are ignored
+
+    Returns:
+        DataFrame with columns ticker, field, old, new, change. change is
+        'added'/'removed' for tickers entering/leaving the universe,
+        'upgrade'/'downgrade' for recommendation_mean moves (lower is
+        better), 'up'/'down' for other numeric fields and 'changed' for text
+    """
+    old_t = _by_ticker(old)
+    new_t = _by_ticker(new)
+    fields = [f for f in (fields or DIFF_FIELDS) if f in old_t.columns and f in new_t.columns]
+
+    parts = []
+
+    added = new_t.index.difference(old_t.index)
+    removed = old_t.index.difference(new_t.index)
+    if len(added):
+        parts.append(pd.DataFrame({'ticker': added, 'field': 'ticker', 'old': None, 'new': added, 'change': 'added'}))
+    if len(removed):
+        parts.append(pd.DataFrame({'ticker': removed, 'field': 'ticker', 'old': removed, 'new': None, 'change': 'removed'}))
+
+    common = new_t.index.intersection(old_t.index)
+    old_c = old_t.loc[common, fields]
+    new_c = new_t.loc[common, fields]
+
+    for field in fields:
+        o = old_c[field]
+        n = new_c[field]
+        numeric = pd.api.types.is_numeric_dtype(o) and pd.api.types.is_numeric_dtype(n)
+
+        if numeric:
+            delta = n - o
+            same = (delta.abs() <= rtol * o.abs()) | (o.isna() & n.isna())
+        else:
+            same = (o == n) | (o.isna() & n.isna())
+        changed = ~same
+        if not changed.any():
+            continue
+
+        o = o[changed]
+        n = n[changed]
+        if numeric:
+            direction = delta[changed].to_numpy()
+            # recommendation_mean runs 1=Strong Buy .. 5=Sell, so lower is an upgrade
+            rising, falling = ('downgrade', 'upgrade') if field == 'recommendation_mean' else ('up', 'down')
+            change = np.select([direction > 0, direction < 0], [rising, falling], 'changed')
+        else:
+            change = 'changed'
+
+        parts.append(pd.DataFrame({
+            'ticker': o.index,
+            'field': field,
+            'old': o.astype('object').to_numpy(),
+            'new': n.astype('object').to_numpy(),
+            'change': change,
+        }))
+
+    if not parts:
+        return pd.DataFrame(columns=CHANGE_COLUMNS)
+
+    return pd.concat(parts, ignore_index=True)[CHANGE_COLUMNS]
+
+
+def screen_changes(
+    old: pd.DataFrame,
+    new: pd.DataFrame,
+    criteria: Dict,
+    style: Optional[str] = None,
+    top_n: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Tickers that entered or exited a screen between two snapshots.
+
+    Args:
+        old: Previous snapshot
+        new: Current snapshot
+        criteria: Filter criteria (as for apply_filters)
+        style: If given with top_n, membership is the ranked top N
+        top_n: Number of ranked candidates that make up the screen
+
+    Returns:
+        DataFrame with columns ticker, change ('entered' or 'exited')
+    """
+    def members(df):
+        if df.empty:
+            return pd.Index([])
+        passed = apply_filters(df, criteria)
+        if style and top_n:
+            passed = rank_candidates(passed, style, top_n)
+        return pd.Index(passed['ticker'])
+
+    before = members(old)
+    after = members(new)
+    entered = after.difference(before)
+    exited = before.difference(after)
+
+    return pd.DataFrame({
+        'ticker': list(entered) + list(exited),
+        'change': ['entered'] * len(entered) + ['exited'] * len(exited),
+    })
@@ -0,0 +1,350 @@
+"""
+Financial Statements Module
+Locally cached quarterly/annual income statement, cash flow and dividend
+history per ticker, refreshed only when a new reporting period is likely,
+plus vectorized multi-year metrics (revenue CAGR, FCF payout, dividend
+growth streak) across the universe.
+"""
+
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from http_session import get_session
+from snapshots import DATA_DIR
+
+STATEMENTS_PATH = DATA_DIR / 'statements.pkl'
+
+# Statement line items kept, with the yfinance row names to try in order
+LINE_ITEMS = {
+    'revenue': ['Total Revenue', 'Operating Revenue'],
+    'net_income': ['Net Income', 'Net Income Common Stockholders'],
+    'operating_cf': ['Operating Cash Flow', 'Cash Flow From Continuing Operating Activities'],
+    'capex': ['Capital Expenditure'],
+    'fcf': ['Free Cash Flow'],
+    'dividends_paid': ['Cash Dividends Paid', 'Common Stock Dividend Paid'],
+}
+
+STATEMENT_COLUMNS = ['ticker', 'freq', 'period_end'] + list(LINE_ITEMS)
+
+# A quarter is ~91 days; filings land up to ~45 days (10-Q) after it ends
+QUARTER_DAYS = 91
+REPORT_LAG_DAYS = 45
+# How often to re-check a ticker whose next report is overdue but hasn't appeared
+RECHECK_DAYS = 7
+# Never re-fetch the same ticker more than once within this window
+MIN_REFETCH_SECONDS = 12 * 60 * 60
+
+DIVIDEND_YEARS = 15
+
+_lock = threading.Lock()
+_last_run = {'due': 0, 'fetched': 0, 'failed': 0, 'skipped': 0}
+
+
+def _empty_cache() -> Dict:
+    return {
+        'statements': pd.DataFrame(columns=STATEMENT_COLUMNS),
+        'dividends': pd.DataFrame({
+            'ticker': pd.Series(dtype=object),
+            'date': pd.Series(dtype='datetime64[ns]'),
+            'amount': pd.Series(dtype='float64'),
+        }),
+        'fetched': {},
+        'latest_period': {},
+    }
+
+
+def load_statements(path: Optional[Path] = None) -> Dict:
+    """
+    Read the statement cache.
+
+    Returns:
+        Dict with 'statements' (long frame: ticker, freq 'q'/'a', period_end
+        and one column per LINE_ITEMS key), 'dividends' (ticker, date,
+        amount), 'fetched' (ticker -> epoch seconds) and 'latest_period'
+        (ticker -> latest quarterly period end)
+    """
+    path = Path(path or STATEMENTS_PATH)
+    if not path.exists():
+        return _empty_cache()
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _write_cache(cache: Dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(cache, f)
+    tmp.replace(path)
+
+
+def _statement_rows(frame: Optional[pd.DataFrame], ticker: str, freq: str) -> pd.DataFrame:
+    """Line items x periods (yfinance layout) -> one row per period."""
+    if frame is None or frame.empty:
+        return pd.DataFrame(columns=STATEMENT_COLUMNS)
+    rows = pd.DataFrame({'period_end': pd.to_datetime(frame.columns)})
+    for item, names in LINE_ITEMS.items():
+        name = next((n for n in names if n in frame.index), None)
+        rows[item] = pd.to_numeric(frame.loc[name], errors='coerce').to_numpy() if name else np.nan
+    rows.insert(0, 'freq', freq)
+    rows.insert(0, 'ticker', ticker)
+    return rows
+
+
+def fetch_statements(ticker: str, session=None) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Fetch quarterly and annual statements plus dividend history for a ticker.
+
+    Returns:
+        Dict with 'statements' and 'dividends' frames in the cache layout,
+        or None if the requests failed
+    """
+    try:
+        stock = yf.Ticker(ticker, session=session or get_session())
+        quarterly = pd.concat([
+            _statement_rows(stock.quarterly_income_stmt, ticker, 'q'),
+            _statement_rows(stock.quarterly_cashflow, ticker, 'q'),
+        ])
+        annual = pd.concat([
+            _statement_rows(stock.income_stmt, ticker, 'a'),
+            _statement_rows(stock.cashflow, ticker, 'a'),
+        ])
+        # Income and cash-flow rows for the same period become one row
+        statements = pd.concat([quarterly, annual]).groupby(
+            ['ticker', 'freq', 'period_end'], as_index=False,
+        ).first()
+
+        dividends = stock.dividends
+        if dividends is None or dividends.empty:
+            dividends = _empty_cache()['dividends']
+        else:
+            dates = pd.to_datetime(dividends.index)
+            if dates.tz is not None:
+                dates = dates.tz_localize(None)
+            dividends = pd.DataFrame({'ticker': ticker, 'date': dates, 'amount': dividends.to_numpy()})
+        return {'statements': statements, 'dividends': dividends}
+
+    except Exception as e:
+        return None
+
+
+def statements_due(
+    tickers: List[str],
+    reported: Optional[Dict[str, float]] = None,
+    now: Optional[float] = None,
+    path: Optional[Path] = None,
+) -> List[str]:
+    """
+    Tickers whose cached statements are missing or probably out of date.
+
+    A ticker is due if it was never fetched; or if its .info
+    mostRecentQuarter (when given in reported) is newer than the latest
+    cached quarter; or, without that hint, once the next quarter's filing
+    deadline has passed (re-checked every RECHECK_DAYS until it appears).
+
+    Args:
+        tickers: Tickers to check
+        reported: ticker -> most recent quarter end (epoch seconds), e.g.
+            the snapshot's most_recent_quarter column
+        now: Current time (epoch seconds)
+        path: Cache file
+
+    Returns:
+        List of tickers to fetch
+    """
+    now = now if now is not None else time.time()
+    reported = reported or {}
+    cache = load_statements(path)
+    fetched, latest_period = cache['fetched'], cache['latest_period']
+
+    due = []
+    for ticker in tickers:
+        last_fetch = fetched.get(ticker)
+        if last_fetch is None:
+            due.append(ticker)
+            continue
+        if now - last_fetch < MIN_REFETCH_SECONDS:
+            continue
+        latest = latest_period.get(ticker)
+        hint = reported.get(ticker)
+        if hint is not None and not pd.isna(hint):
+            if latest is None or hint > latest.timestamp():
+                due.append(ticker)
+            continue
+        if latest is None:
+            # Nothing published (e.g. an ETF); just look again now and then
+            expected = last_fetch + RECHECK_DAYS * 86400
+        else:
+            expected = (latest + pd.Timedelta(days=QUARTER_DAYS + REPORT_LAG_DAYS)).timestamp()
+        if now >= expected and now - last_fetch >= RECHECK_DAYS * 86400:
+            due.append(ticker)
+    return due
+
+
+def refresh_statements(
+    tickers: List[str],
+    reported: Optional[Dict[str, float]] = None,
+    max_workers: int = 8,
+    path: Optional[Path] = None,
+) -> Dict:
+    """
+    Fetch statements for the tickers that are due and merge them into the cache.
+
+    New periods are added to what is already cached, so history keeps
+    growing past the few periods Yahoo returns per request.
+
+    Args:
+        tickers: Universe to keep current
+        reported: ticker -> most recent quarter end (epoch seconds) hints
+        max_workers: Number of parallel fetch threads
+        path: Cache file
+
+    Returns:
+        Dict with counts of due, fetched, failed and skipped tickers
+    """
+    path = Path(path or STATEMENTS_PATH)
+    due = statements_due(tickers, reported, path=path)
+    results = {}
+    if due:
+        session = get_session(pool_size=max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for ticker, result in zip(due, executor.map(lambda t: fetch_statements(t, session), due)):
+                results[ticker] = result
+
+    fetched = {t: r for t, r in results.items() if r is not None}
+    stats = {
+        'due': len(due),
+        'fetched': len(fetched),
+        'failed': len(results) - len(fetched),
+        'skipped': len(tickers) - len(due),
+    }
+
+    with _lock:
+        if fetched:
+            cache = load_statements(path)
+            now = time.time()
+            statements = pd.concat(
+                [cache['statements']] + [r['statements'] for r in fetched.values()], ignore_index=True,
+            ).drop_duplicates(['ticker', 'freq', 'period_end'], keep='last')
+            # Dividend history comes back whole, so it replaces the cached one
+            cutoff = pd.Timestamp.now() - pd.DateOffset(years=DIVIDEND_YEARS)
+            dividends = pd.concat(
+                [cache['dividends'][~cache['dividends']['ticker'].isin(list(fetched))]]
+                + [r['dividends'][r['dividends']['date'] >= cutoff] for r in fetched.values()],
+                ignore_index=True,
+            )
+            quarters = statements[statements['freq'] == 'q']
+            latest = quarters.groupby('ticker')['period_end'].max()
+            cache['statements'] = statements.sort_values(['ticker', 'freq', 'period_end'], ignore_index=True)
+            cache['dividends'] = dividends
+            cache['fetched'].update({t: now for t in fetched})
+            cache['latest_period'].update({t: latest[t] for t in fetched if t in latest.index})
+            _write_cache(cache, path)
+        _last_run.update(stats)
+    return stats
+
+
+def statements_stats() -> Dict:
+    """Counts from the last refresh_statements call."""
+    with _lock:
+        return dict(_last_run)
+
+
+def _pivot(frame: pd.DataFrame, index: str, columns: str, values: str) -> pd.DataFrame:
+    if frame.empty:
+        return pd.DataFrame()
+    return frame.pivot_table(index=index, columns=columns, values=values, aggfunc='sum')
+
+
+def statement_metrics(
+    tickers: Optional[List[str]] = None,
+    cagr_years: int = 3,
+    path: Optional[Path] = None,
+    now: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    """
+    Multi-period metrics from the cached statements, vectorized across tickers.
+
+    Args:
+        tickers: Tickers to return (defaults to every cached ticker)
+        cagr_years: Target span for revenue CAGR; shorter spans are used
+            when fewer annual periods are cached
+        path: Cache file
+        now: Reference date for dividend years (defaults to today)
+
+    Returns:
+        DataFrame with ticker, revenue_cagr (decimal), revenue_cagr_years,
+        fcf_ttm, dividends_ttm, fcf_payout_ratio (TTM dividends paid /
+        TTM free cash flow; NaN if FCF <= 0), dividend_growth_streak
+        (consecutive calendar years of higher dividends per share) and
+        latest_period
+    """
+    cache = load_statements(path)
+    statements, dividends = cache['statements'], cache['dividends']
+    now = now or pd.Timestamp.now()
+    if tickers is None:
+        tickers = sorted(set(statements['ticker']) | set(dividends['ticker']))
+    index = pd.Index(tickers, name='ticker')
+    result = pd.DataFrame(index=index)
+
+    # Revenue CAGR from annual periods, newest vs the one cagr_years back
+    annual = statements[(statements['freq'] == 'a') & statements['revenue'].notna()]
+    annual = annual.sort_values('period_end', ascending=False)
+    annual = annual.assign(age=annual.groupby('ticker').cumcount())
+    revenue = _pivot(annual[annual['age'] <= cagr_years], 'ticker', 'age', 'revenue').reindex(index)
+    if revenue.empty:
+        result['revenue_cagr'] = np.nan
+        result['revenue_cagr_years'] = np.nan
+    else:
+        values = revenue.to_numpy(dtype='float64')
+        present = np.isfinite(values) & (values > 0)
+        # Oldest available age per ticker (0 if only the latest year is known)
+        span = np.where(present, np.arange(values.shape[1]), -1).max(axis=1)
+        oldest = values[np.arange(len(values)), np.maximum(span, 0)]
+        latest = values[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cagr = (latest / oldest) ** (1 / span) - 1
+        valid = (span >= 1) & present[:, 0]
+        result['revenue_cagr'] = np.where(valid, cagr, np.nan)
+        result['revenue_cagr_years'] = np.where(valid, span, np.nan)
+
+    # Trailing twelve months from the last four quarters
+    quarterly = statements[statements['freq'] == 'q'].sort_values('period_end', ascending=False)
+    quarterly = quarterly[quarterly.groupby('ticker').cumcount() < 4]
+    fcf = quarterly['fcf'].fillna(quarterly['operating_cf'] + quarterly['capex'])
+    ttm = pd.DataFrame({
+        'ticker': quarterly['ticker'],
+        'fcf': fcf,
+        'dividends': -quarterly['dividends_paid'].fillna(0),
+    }).groupby('ticker').sum(min_count=4).reindex(index)
+    ttm.columns = ['fcf_ttm', 'dividends_ttm']
+    result['fcf_ttm'] = ttm['fcf_ttm']
+    result['dividends_ttm'] = ttm['dividends_ttm']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['fcf_payout_ratio'] = np.where(ttm['fcf_ttm'] > 0, ttm['dividends_ttm'] / ttm['fcf_ttm'], np.nan)
+
+    # Dividend growth streak over complete calendar years
+    last_year = now.year - 1
+    year = pd.to_datetime(dividends['date']).dt.year
+    paid = dividends.assign(year=year)[year <= last_year]
+    per_year = _pivot(paid, 'ticker', 'year', 'amount')
+    if per_year.empty:
+        result['dividend_growth_streak'] = 0
+    else:
+        years = range(per_year.columns.min(), last_year + 1)
+        values = per_year.reindex(index=index, columns=years).fillna(0).to_numpy()
+        # Small tolerance so rounding in the per-share amounts isn't a raise
+        raised = (values[:, 1:] > values[:, :-1] * 1.001) & (values[:, :-1] > 0)
+        # Count trailing consecutive raises ending at last_year
+        result['dividend_growth_streak'] = np.cumprod(raised[:, ::-1], axis=1).sum(axis=1) if raised.shape[1] else 0
+
+    result['latest_period'] = pd.Series(cache['latest_period'], dtype='datetime64[ns]').reindex(index)
+    return result.reset_index()
@@ -0,0 +1,266 @@
+"""
+Watchlist Module
+Saved screens (criteria + style + top_n) persisted locally, kept up to date
+incrementally as refreshes change individual tickers.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from expressions import ExpressionError
+from screener import SCORE_INPUTS, STYLE_WEIGHTS, criterion_columns, criterion_mask, factor_scores
+from snapshots import DATA_DIR
+
+WATCHLIST_PATH = DATA_DIR / 'watchlists.json'
+
+EVENT_COLUMNS = ['screen', 'ticker', 'event', 'old_rank', 'new_rank']
+
+
+def load_screens(path: Optional[Path] = None) -> Dict[str, Dict]:
+    """Load saved screens as {name: {'criteria', 'style', 'top_n'}}."""
+    path = Path(path or WATCHLIST_PATH)
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_screen(name: str, criteria: Dict, style: str, top_n: int = 20,
+                path: Optional[Path] = None) -> Dict[str, Dict]:
+    """Add or replace a saved screen and return all saved screens."""
+    path = Path(path or WATCHLIST_PATH)
+    screens = load_screens(path)
+    screens[name] = {'criteria': criteria, 'style': style.lower(), 'top_n': int(top_n)}
+    _write_screens(screens, path)
+    return screens
+
+
+def delete_screen(name: str, path: Optional[Path] = None) -> Dict[str, Dict]:
+    """Remove a saved screen (if present) and return the remaining ones."""
+    path = Path(path or WATCHLIST_PATH)
+    screens = load_screens(path)
+    screens.pop(name, None)
+    _write_screens(screens, path)
+    return screens
+
+
+def _write_screens(screens: Dict[str, Dict], path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(screens, f, indent=2, sort_keys=True)
+    tmp.replace(path)
+
+
+def _freeze(value):
+    """Hashable form of a criteria value, for sharing masks across screens."""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(value))
+    return value
+
+
+class WatchlistMonitor:
+    """
+    Keeps every saved screen's passing set and top-N ranking in memory.
+
+    State is held as flat arrays over the ticker universe: one score array
+    per style and one pass/fail array per screen. rebuild() evaluates all
+    screens over a full snapshot once; update() then re-filters and
+    re-scores only the rows a refresh changed, computing each distinct
+    criterion mask and style score once and sharing it across screens.
+
+    A screen whose criteria can't be evaluated (e.g. an expression naming a
+    column the data lacks) is skipped and listed in broken with the error;
+    the other screens still update, and every update re-evaluates all
+    screens over the full snapshot until none is broken.
+
+    A monitor shared between threads (e.g. app sessions) must be used
+    under its lock.
+    """
+
+    def __init__(self, screens: Optional[Dict[str, Dict]] = None):
+        self.lock = threading.Lock()
+        self.screens = screens if screens is not None else load_screens()
+        self._tickers: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._scores: Dict[str, np.ndarray] = {}
+        self._passes: Dict[str, np.ndarray] = {}
+        self._members: Dict[str, Dict[str, int]] = {}
+        self._built_for: Optional[str] = None
+        self.broken: Dict[str, str] = {}
+
+    def rebuild(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluate every screen over a full snapshot.
+
+        Previous memberships are kept, so the returned events describe how
+        each screen changed (everything 'entered' on the first build).
+        """
+        self._tickers = []
+        self._positions = {}
+        self._scores = {}
+        self._passes = {}
+        self._members = {name: ranks for name, ranks in self._members.items() if name in self.screens}
+        self.broken = {}
+        self._built_for = json.dumps(self.screens, sort_keys=True)
+        return self._apply(df, df['ticker'] if not df.empty else [])
+
+    def _grow(self, tickers: pd.Index):
+        """Give newly seen tickers a slot in every state array."""
+        new = [t for t in tickers if t not in self._positions]
+        for ticker in new:
+            self._positions[ticker] = len(self._tickers)
+            self._tickers.append(ticker)
+        size = len(self._tickers)
+        for style in {screen.get('style', 'blend') for screen in self.screens.values()}:
+            scores = self._scores.get(style, np.empty(0))
+            if len(scores) < size:
+                self._scores[style] = np.concatenate([scores, np.full(size - len(scores), np.nan)])
+        for name in self.screens:
+            passes = self._passes.get(name, np.empty(0, dtype=bool))
+            if len(passes) < size:
+                self._passes[name] = np.concatenate([passes, np.zeros(size - len(passes), dtype=bool)])
+
+    def input_columns(self) -> List[str]:
+        """
+        Every column the saved screens' filters and scores read.
+
+        Diff snapshots on these (diff_snapshots(old, new, fields=...)) to
+        get the tickers update() must re-evaluate.
+        """
+        columns = set(SCORE_INPUTS)
+        for screen in self.screens.values():
+            for key, value in screen['criteria'].items():
+                columns |= criterion_columns(key, value)
+        return sorted(columns)
+
+    def update(self, df: pd.DataFrame, changed: Iterable[str]) -> pd.DataFrame:
+        """
+        Apply a refresh to every saved screen.
+
+        Args:
+            df: The new snapshot (only rows for changed tickers are read,
+                unless a screen is broken and everything is re-evaluated)
+            changed: Tickers whose data changed, entered or left the
+                universe, e.g. diff_snapshots(old, new,
+                fields=self.input_columns())['ticker'].unique()
+
+        Returns:
+            DataFrame of events (screen, ticker, event, old_rank, new_rank)
+            where event is 'entered', 'exited' or 'rank_change'
+        """
+        if not self.screens:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        # Nothing built yet, screens added/edited/removed since the last build,
+        # or broken screens whose state is only partly evaluated
+        if json.dumps(self.screens, sort_keys=True) != self._built_for or self.broken:
+            return self.rebuild(df)
+        return self._apply(df, changed)
+
+    def _apply(self, df: pd.DataFrame, changed: Iterable[str]) -> pd.DataFrame:
+        changed = pd.Index(pd.unique(pd.Series(list(changed), dtype='object')))
+        if df.empty:
+            rows = pd.DataFrame(index=pd.Index([], dtype='object'))
+        else:
+            rows = df.drop_duplicates('ticker', keep='last').set_index('ticker')
+            rows = rows.loc[changed.intersection(rows.index)]
+        self._grow(changed)
+
+        present = np.array([self._positions[t] for t in rows.index], dtype='int64')
+        gone = np.array([self._positions[t] for t in changed.difference(rows.index)], dtype='int64')
+        touched = np.concatenate([present, gone])
+
+        # Scores for the changed rows, once per style
+        factors = factor_scores(rows) if len(rows) else None
+        for style, scores in self._scores.items():
+            if factors is not None:
+                weights = STYLE_WEIGHTS.get(style, STYLE_WEIGHTS['blend'])
+                scores[present] = (factors.to_numpy() @ pd.Series(weights)[factors.columns].to_numpy()).round(2)
+            scores[gone] = np.nan
+
+        mask_cache = {}
+        events = []
+        for name, screen in self.screens.items():
+            try:
+                mask = self._mask(rows, screen['criteria'], mask_cache)
+            except ExpressionError as e:
+                # Leave this screen's state as it was rather than fail every screen
+                self.broken[name] = str(e)
+                continue
+            self.broken.pop(name, None)
+
+            passes = self._passes[name]
+            was_tracked = passes[touched].any()
+            passes[present] = mask
+            passes[gone] = False
+
+            # Nothing this screen tracks was touched
+            if not was_tracked and not mask.any():
+                continue
+
+            new_members = self._top(passes, self._scores[screen.get('style', 'blend')], int(screen.get('top_n', 20)))
+            events.extend(_membership_events(name, self._members.get(name, {}), new_members))
+            self._members[name] = new_members
+
+        if not events:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        return pd.DataFrame(events, columns=EVENT_COLUMNS)
+
+    def _mask(self, rows: pd.DataFrame, criteria: Dict, mask_cache: Dict) -> np.ndarray:
+        """Which rows pass every criterion, sharing each distinct criterion's mask via mask_cache."""
+        mask = np.ones(len(rows), dtype=bool)
+        if not len(rows):
+            return mask
+        for key, value in criteria.items():
+            cache_key = (key, _freeze(value))
+            if cache_key not in mask_cache:
+                condition = criterion_mask(rows, key, value)
+                mask_cache[cache_key] = None if condition is None else condition.to_numpy(dtype=bool)
+            if mask_cache[cache_key] is not None:
+                mask &= mask_cache[cache_key]
+        return mask
+
+    def _top(self, passes: np.ndarray, scores: np.ndarray, top_n: int) -> Dict[str, int]:
+        """Ranks of the top_n passing tickers (ties broken by first seen)."""
+        candidates = np.flatnonzero(passes)
+        if len(candidates) > top_n:
+            keep = np.argpartition(-scores[candidates], top_n - 1)[:top_n]
+            # Include everything tied with the cut-off so tie-breaking is stable
+            cutoff = scores[candidates[keep]].min()
+            candidates = candidates[scores[candidates] >= cutoff]
+        order = np.lexsort((candidates, -scores[candidates]))[:top_n]
+        return {self._tickers[i]: rank for rank, i in enumerate(candidates[order], start=1)}
+
+    def members(self, name: str) -> List[str]:
+        """Current top-N tickers of a saved screen, best first."""
+        ranks = self._members.get(name, {})
+        return sorted(ranks, key=ranks.get)
+
+    def scores(self, name: str) -> pd.Series:
+        """Scores of every ticker currently passing a screen's filters."""
+        passes = self._passes.get(name)
+        if passes is None:
+            return pd.Series(dtype='float64')
+        style = self.screens[name].get('style', 'blend')
+        idx = np.flatnonzero(passes)
+        scores = pd.Series(self._scores[style][idx], index=[self._tickers[i] for i in idx])
+        return scores.sort_values(ascending=False)
+
+
+def _membership_events(name: str, old: Dict[str, int], new: Dict[str, int]) -> List[tuple]:
+    events = []
+    for ticker, rank in new.items():
+        old_rank = old.get(ticker)
+        if old_rank is None:
+            events.append((name, ticker, 'entered', None, rank))
+        elif old_rank != rank:
+            events.append((name, ticker, 'rank_change', old_rank, rank))
+    for ticker, old_rank in old.items():
+        if ticker not in new:
+            events.append((name, ticker, 'exited', old_rank, None))
+    return events
@@ -0,0 +1,219 @@
+"""
+Weight Sweep Module
+Scores thousands of candidate style weight vectors at once (one matrix
+multiply over the factor sub-scores), optionally against history, and
+exports a chosen vector as a new style.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest import build_panels, masked_mean
+from screener import STYLE_WEIGHTS, factor_scores, register_style
+from snapshots import DATA_DIR
+
+FACTORS = list(STYLE_WEIGHTS['blend'])
+
+CUSTOM_STYLES_PATH = DATA_DIR / 'styles.json'
+
+# Weight vectors scored per matrix multiply; bounds memory to
+# tickers x SWEEP_CHUNK float32 scores at a time
+SWEEP_CHUNK = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def random_weights(n: int, seed: Optional[int] = None, include_styles: bool = True) -> pd.DataFrame:
+    """
+    Sample candidate weight vectors uniformly from the simplex.
+
+    Args:
+        n: Number of random vectors
+        seed: Random seed
+        include_styles: Prepend the built-in styles (indexed by name)
+
+    Returns:
+        DataFrame with one row per weight vector and one column per factor
+    """
+    rng = np.random.default_rng(seed)
+    samples = pd.DataFrame(rng.dirichlet(np.ones(len(FACTORS)), size=n), columns=FACTORS)
+    samples.index = [f'w{i}' for i in range(n)]
+    if include_styles:
+        styles = pd.DataFrame.from_dict(STYLE_WEIGHTS, orient='index')[FACTORS]
+        samples = pd.concat([styles, samples])
+    return samples
+
+
+def _weight_matrix(weight_vectors: pd.DataFrame) -> np.ndarray:
+    return weight_vectors[FACTORS].to_numpy(dtype='float32')
+
+
+def sweep_weights(
+    df: pd.DataFrame,
+    weight_vectors: pd.DataFrame,
+    top_n: int = 20,
+    baseline: str = 'blend',
+) -> pd.DataFrame:
+    """
+    Compare how each weight vector ranks one universe against a baseline style.
+
+    Args:
+        df: Snapshot (tickers x screener columns), typically already filtered
+        weight_vectors: Rows of factor weights (e.g. from random_weights)
+        top_n: Size of the top-N set to compare
+        baseline: Style whose ranking the vectors are compared to
+
+    Returns:
+        weight_vectors with added columns top_overlap (tickers shared with
+        the baseline top-N) and score_corr (correlation of scores with the
+        baseline's across the whole universe)
+    """
+    factors = factor_scores(df)[FACTORS].to_numpy(dtype='float32')
+    k = min(top_n, len(factors))
+
+    base = factors @ np.array([STYLE_WEIGHTS[baseline][f] for f in FACTORS], dtype='float32')
+    base_top = np.zeros(len(base), dtype=bool)
+    base_top[np.argpartition(-base, k - 1)[:k]] = True
+    base_centered = base - base.mean()
+    base_norm = np.linalg.norm(base_centered)
+
+    weights = _weight_matrix(weight_vectors)
+    overlap = np.empty(len(weights), dtype='int64')
+    corr = np.empty(len(weights), dtype='float64')
+    for start in range(0, len(weights), SWEEP_CHUNK):
+        chunk = weights[start:start + SWEEP_CHUNK]
+        scores = chunk @ factors.T                      # vectors x tickers
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        overlap[start:start + len(chunk)] = base_top[top].sum(axis=1)
+
+        centered = scores - scores.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(centered, axis=1) * base_norm
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr[start:start + len(chunk)] = (centered @ base_centered) / norms
+
+    result = weight_vectors[FACTORS].copy()
+    result['top_overlap'] = overlap
+    result['score_corr'] = corr
+    return result
+
+
+def optimize_weights(
+    history: pd.DataFrame,
+    weight_vectors: pd.DataFrame,
+    top_n: int = 20,
+    rebalance_every: int = 1,
+    criteria: Optional[Dict] = None,
+    objective: str = 'sharpe',
+    periods_per_year: float = 52,
+) -> pd.DataFrame:
+    """
+    Backtest every weight vector's top-N basket and rank them by an objective.
+
+    Args:
+        history: Long frame from backtest.load_history
+        weight_vectors: Rows of factor weights (e.g. from random_weights)
+        top_n: Basket size
+        rebalance_every: Rebalance every this many snapshot dates
+        criteria: Optional filter criteria applied at each rebalance
+        objective: Column to sort by: 'mean_return', 'sharpe' or 'hit_rate'
+        periods_per_year: Holding periods per year (for annualizing)
+
+    Returns:
+        weight_vectors with mean_return, volatility, sharpe and hit_rate
+        columns, best objective first
+    """
+    panels = build_panels(history, rebalance_every, criteria)
+    result = weight_vectors[FACTORS].copy()
+    if panels is None:
+        return result.assign(mean_return=np.nan, volatility=np.nan, sharpe=np.nan, hit_rate=np.nan)
+
+    order = [panels['factor_names'].index(f) for f in FACTORS]
+    factors = panels['factors'][:, :, order].astype('float32')
+    forward, held = panels['forward'], panels['held']
+    benchmark = masked_mean(forward, held)
+
+    weights = _weight_matrix(weight_vectors)
+    k = min(top_n, factors.shape[1])
+    returns = np.full((len(forward), len(weights)), np.nan)
+
+    for p in range(len(forward)):
+        tradable = held[p]
+        if not tradable.any():
+            continue
+        period_factors = factors[p, tradable]
+        period_forward = forward[p, tradable]
+        kp = min(k, len(period_factors))
+        for start in range(0, len(weights), SWEEP_CHUNK):
+            scores = weights[start:start + SWEEP_CHUNK] @ period_factors.T   # vectors x tickers
+            top = np.argpartition(-scores, kp - 1, axis=1)[:, :kp]
+            picked = period_forward[top]
+            valid = np.isfinite(picked)
+            counts = valid.sum(axis=1)
+            with np.errstate(invalid='ignore'):
+                returns[p, start:start + len(scores)] = np.where(valid, picked, 0.0).sum(axis=1) / np.where(counts > 0, counts, np.nan)
+
+    filled = np.nan_to_num(returns)
+    mean = filled.mean(axis=0)
+    vol = filled.std(axis=0, ddof=1) if len(filled) > 1 else np.zeros(len(weights))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['mean_return'] = mean * periods_per_year
+        result['volatility'] = vol * np.sqrt(periods_per_year)
+        result['sharpe'] = np.where(vol > 0, mean / vol * np.sqrt(periods_per_year), np.nan)
+    result['hit_rate'] = (returns > benchmark[:, None]).mean(axis=0)
+
+    return result.sort_values(objective, ascending=False)
+
+
+def export_style(name: str, weights: Dict[str, float], path: Optional[Path] = None) -> Dict[str, float]:
+    """
+    Save a weight vector as a named style and register it with the screener.
+
+    Args:
+        name: Style name shown in the app (used lowercase by rank_candidates)
+        weights: Factor weights, e.g. optimize_weights(...).iloc[0]
+        path: Where custom styles are stored
+
+    Returns:
+        The normalized weights
+    """
+    normalized = register_style(name, {f: float(weights[f]) for f in FACTORS})
+
+    path = Path(path or CUSTOM_STYLES_PATH)
+    styles = _read_styles(path)
+    styles[name] = normalized
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(styles, f, indent=2)
+    tmp.replace(path)
+    return normalized
+
+
+def load_custom_styles(path: Optional[Path] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Register every saved custom style and return them by display name.
+
+    Saved styles that can't be registered (e.g. named after a built-in
+    style) are skipped with a logged warning.
+    """
+    styles = {}
+    for name, weights in _read_styles(Path(path or CUSTOM_STYLES_PATH)).items():
+        try:
+            register_style(name, weights)
+        except ValueError as e:
+            logger.warning("Skipping saved style %r: %s", name, e)
+            continue
+        styles[name] = weights
+    return styles
+
+
+def _read_styles(path: Path) -> Dict[str, Dict[str, float]]:
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,406 @@
+"""
+Sharded Refresh Module
+Splits a universe refresh into shards on a durable SQLite work queue so
+several worker processes (or hosts sharing the data directory) can fetch
+in parallel. Shards are claimed under a lease; a crashed worker's shards
+are re-claimed once the lease expires, and a restarted refresh resumes
+from the shards already done.
+
+Run with:
+    python workqueue.py start --universe us   # queue a refresh (or resume one)
+    python workqueue.py worker --threads 10   # run on as many machines/processes as wanted
+    python workqueue.py run --processes 4     # start + local workers in one go
+    python workqueue.py status
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from fx import add_usd_columns
+from screener import fetch_stock_data
+from snapshots import DATA_DIR, DEFAULT_UNIVERSE, save_snapshot
+from data.universes import UNIVERSES
+
+QUEUE_PATH = DATA_DIR / 'queue.db'
+
+SHARD_SIZE = 25
+# A shard not completed within this many seconds is handed to another worker
+LEASE_SECONDS = 180
+MAX_ATTEMPTS = 3
+# fetch_stock_data drops tickers it couldn't fetch rather than raising, so a
+# shard missing more than this share of its tickers (rate limiting, network
+# errors) is retried; after the last attempt whatever was fetched is kept
+MAX_MISSING_SHARE = 0.2
+POLL_SECONDS = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    universe TEXT NOT NULL,
+    created REAL NOT NULL,
+    status TEXT NOT NULL,
+    version TEXT
+);
+CREATE TABLE IF NOT EXISTS shards (
+    run_id TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    tickers TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    PRIMARY KEY (run_id, shard)
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (run_id, ticker)
+);
+"""
+
+
+@contextmanager
+def _connect(path: Optional[Path] = None):
+    path = Path(path or QUEUE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Rollback journal rather than WAL: WAL needs shared memory, which
+    # doesn't work when several hosts share the directory
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    try:
+        conn.executescript(_SCHEMA)
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection):
+    # IMMEDIATE takes the write lock up front so two workers can't claim the same shard
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def _universe_key(universe: str, tickers: List[str]) -> str:
+    # Snapshot universe plus a hash of the exact tickers, so a resumed run
+    # covers the same list
+    digest = hashlib.sha256('\n'.join(tickers).encode()).hexdigest()[:16]
+    return f"{universe}:{digest}"
+
+
+def start_refresh(
+    tickers: List[str],
+    shard_size: int = SHARD_SIZE,
+    resume: bool = True,
+    path: Optional[Path] = None,
+    universe: str = DEFAULT_UNIVERSE,
+) -> str:
+    """
+    Queue a sharded refresh of the universe.
+
+    Args:
+        tickers: Universe to fetch
+        shard_size: Tickers per work item
+        resume: Reuse an unfinished run over the same universe instead of
+            starting over
+        path: Queue database
+        universe: Snapshot universe the finished run is stored under
+
+    Returns:
+        Run id
+    """
+    tickers = list(dict.fromkeys(tickers))
+    universe = _universe_key(universe, tickers)
+    with _connect(path) as conn, _transaction(conn):
+        if resume:
+            row = conn.execute(
+                "SELECT run_id FROM runs WHERE universe = ? AND status = 'running' ORDER BY created DESC LIMIT 1",
+                (universe,),
+            ).fetchone()
+            if row:
+                return row[0]
+        run_id = time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+        conn.execute(
+            "INSERT INTO runs (run_id, universe, created, status) VALUES (?, ?, ?, 'running')",
+            (run_id, universe, time.time()),
+        )
+        conn.executemany(
+            "INSERT INTO shards (run_id, shard, tickers, status) VALUES (?, ?, ?, 'pending')",
+            [
+                (run_id, i, json.dumps(tickers[start:start + shard_size]))
+                for i, start in enumerate(range(0, len(tickers), shard_size))
+            ],
+        )
+    return run_id
+
+
+def _latest_running(conn: sqlite3.Connection) -> Optional[str]:
+    row = conn.execute(
+        "SELECT run_id FROM runs WHERE status = 'running' ORDER BY created DESC LIMIT 1"
+    ).fetchone()
+    return row[0] if row else None
+
+
+def claim_shard(
+    run_id: str,
+    worker_id: str,
+    lease_seconds: float = LEASE_SECONDS,
+    path: Optional[Path] = None,
+) -> Optional[Tuple[int, List[str]]]:
+    """
+    Lease the next pending (or expired) shard of a run.
+
+    Returns:
+        (shard number, tickers), or None if nothing is claimable right now
+    """
+    now = time.time()
+    with _connect(path) as conn, _transaction(conn):
+        row = conn.execute(
+            """
+            SELECT shard, tickers FROM shards
+            WHERE run_id = ? AND attempts < ?
+              AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+            ORDER BY attempts, shard LIMIT 1
+            """,
+            (run_id, MAX_ATTEMPTS, now),
+        ).fetchone()
+        if row is None:
+            # Expired leases that used up their attempts are given up on
+            conn.execute(
+                """
+                UPDATE shards SET status = 'failed', error = COALESCE(error, 'lease expired')
+                WHERE run_id = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?
+                """,
+                (run_id, now, MAX_ATTEMPTS),
+            )
+            return None
+        conn.execute(
+            """
+            UPDATE shards SET status = 'leased', attempts = attempts + 1, owner = ?, lease_expires = ?
+            WHERE run_id = ? AND shard = ?
+            """,
+            (worker_id, now + lease_seconds, run_id, row[0]),
+        )
+    return row[0], json.loads(row[1])
+
+
+def complete_shard(run_id: str, shard: int, rows: List[Dict], path: Optional[Path] = None):
+    """Store a shard's fetched rows and mark it done (idempotent)."""
+    with _connect(path) as conn, _transaction(conn):
+        conn.executemany(
+            "INSERT OR REPLACE INTO results (run_id, ticker, data) VALUES (?, ?, ?)",
+            [(run_id, row['ticker'], json.dumps(row)) for row in rows],
+        )
+        conn.execute(
+            "UPDATE shards SET status = 'done', lease_expires = NULL, error = NULL WHERE run_id = ? AND shard = ?",
+            (run_id, shard),
+        )
+
+
+def fail_shard(run_id: str, shard: int, error: str, path: Optional[Path] = None,
+               rows: Optional[List[Dict]] = None):
+    """
+    Release a shard after an error; it is retried until MAX_ATTEMPTS.
+
+    Rows fetched before the error are stored, so a shard that runs out of
+    attempts still contributes them to the snapshot.
+    """
+    with _connect(path) as conn, _transaction(conn):
+        if rows:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (run_id, ticker, data) VALUES (?, ?, ?)",
+                [(run_id, row['ticker'], json.dumps(row)) for row in rows],
+            )
+        conn.execute(
+            """
+            UPDATE shards SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                              lease_expires = NULL, error = ?
+            WHERE run_id = ? AND shard = ? AND status = 'leased'
+            """,
+            (MAX_ATTEMPTS, error[:500], run_id, shard),
+        )
+
+
+def run_status(run_id: Optional[str] = None, path: Optional[Path] = None) -> Dict:
+    """
+    Progress of a run (defaults to the newest unfinished one, else the newest).
+
+    Returns:
+        Dict with run_id, status, snapshot version, shard counts by state
+        and the number of tickers fetched so far
+    """
+    with _connect(path) as conn:
+        run_id = run_id or _latest_running(conn) or (conn.execute(
+            "SELECT run_id FROM runs ORDER BY created DESC LIMIT 1"
+        ).fetchone() or [None])[0]
+        if run_id is None:
+            return {}
+        status, version = conn.execute(
+            "SELECT status, version FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        counts = dict(conn.execute(
+            "SELECT status, COUNT(*) FROM shards WHERE run_id = ? GROUP BY status", (run_id,)
+        ).fetchall())
+        fetched = conn.execute("SELECT COUNT(*) FROM results WHERE run_id = ?", (run_id,)).fetchone()[0]
+    return {
+        'run_id': run_id,
+        'status': status,
+        'version': version,
+        'shards': sum(counts.values()),
+        **{state: counts.get(state, 0) for state in ('pending', 'leased', 'done', 'failed')},
+        'tickers_fetched': fetched,
+    }
+
+
+def partial_results(run_id: str, path: Optional[Path] = None) -> pd.DataFrame:
+    """Everything fetched so far in a run, as a screener DataFrame."""
+    with _connect(path) as conn:
+        rows = [json.loads(data) for (data,) in conn.execute(
+            "SELECT data FROM results WHERE run_id = ?", (run_id,)
+        )]
+    return pd.DataFrame(rows)
+
+
+def finalize_run(run_id: str, path: Optional[Path] = None) -> Optional[str]:
+    """
+    Store a finished run's results as a snapshot, exactly once.
+
+    Returns:
+        Snapshot version, or None if shards are still outstanding or
+        another worker already finalized the run
+    """
+    with _connect(path) as conn, _transaction(conn):
+        outstanding = conn.execute(
+            "SELECT COUNT(*) FROM shards WHERE run_id = ? AND status IN ('pending', 'leased')", (run_id,)
+        ).fetchone()[0]
+        run = conn.execute("SELECT status, universe FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if outstanding or run is None or run[0] != 'running':
+            return None
+        rows = [json.loads(data) for (data,) in conn.execute(
+            "SELECT data FROM results WHERE run_id = ?", (run_id,)
+        )]
+        # Runs queued before universes were recorded hold just the hash
+        universe = run[1].split(':')[0] if ':' in run[1] else DEFAULT_UNIVERSE
+        version = save_snapshot(add_usd_columns(pd.DataFrame(rows)), universe=universe) if rows else None
+        conn.execute("UPDATE runs SET status = 'complete', version = ? WHERE run_id = ?", (version, run_id))
+    return version
+
+
+def run_worker(
+    run_id: Optional[str] = None,
+    worker_id: Optional[str] = None,
+    threads: int = 10,
+    lease_seconds: float = LEASE_SECONDS,
+    path: Optional[Path] = None,
+) -> Dict:
+    """
+    Claim and fetch shards until the run is finished.
+
+    While other workers still hold leases the worker keeps polling, so it
+    can take over their shards if they die. The worker that completes the
+    last shard writes the snapshot.
+
+    Args:
+        run_id: Run to work on (defaults to the newest unfinished run)
+        worker_id: Name recorded on leases (defaults to host:pid)
+        threads: Fetch threads within this worker
+        lease_seconds: How long a claimed shard is reserved
+        path: Queue database
+
+    Returns:
+        Dict with run_id, shards and tickers this worker completed, and the
+        snapshot version if this worker finalized the run
+    """
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    if run_id is None:
+        with _connect(path) as conn:
+            run_id = _latest_running(conn)
+    summary = {'run_id': run_id, 'shards': 0, 'tickers': 0, 'version': None}
+    if run_id is None:
+        return summary
+
+    while True:
+        claimed = claim_shard(run_id, worker_id, lease_seconds, path)
+        if claimed is None:
+            status = run_status(run_id, path)
+            if status['status'] != 'running':
+                return summary
+            if status['pending'] == 0 and status['leased'] == 0:
+                summary['version'] = finalize_run(run_id, path)
+                return summary
+            time.sleep(POLL_SECONDS)
+            continue
+
+        shard, tickers = claimed
+        try:
+            df = fetch_stock_data(tickers, max_workers=threads)
+        except Exception as e:
+            fail_shard(run_id, shard, f'{type(e).__name__}: {e}', path)
+            continue
+        missing = set(tickers) - set(df['ticker'] if not df.empty else [])
+        if len(missing) > MAX_MISSING_SHARE * len(tickers):
+            fail_shard(run_id, shard, f'{len(missing)} of {len(tickers)} tickers not fetched', path,
+                       df.to_dict('records'))
+            continue
+        complete_shard(run_id, shard, df.to_dict('records'), path)
+        summary['shards'] += 1
+        summary['tickers'] += len(df)
+
+
+def _worker_process(run_id: str, threads: int, path: Optional[str]):
+    print(run_worker(run_id, threads=threads, path=path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded universe refresh over a local work queue")
+    parser.add_argument('command', choices=['start', 'worker', 'run', 'status'])
+    parser.add_argument('--run-id', default=None)
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE)
+    parser.add_argument('--threads', type=int, default=10, help="Fetch threads per worker")
+    parser.add_argument('--processes', type=int, default=2, help="Local workers for 'run'")
+    parser.add_argument('--restart', action='store_true', help="Start a new run instead of resuming")
+    parser.add_argument('--queue', default=None, help="Queue database (defaults to ~/.investscout/queue.db)")
+    parser.add_argument('--universe', choices=sorted(UNIVERSES), default=DEFAULT_UNIVERSE,
+                        help="Universe to refresh (see data/universes.py)")
+    args = parser.parse_args()
+
+    tickers = UNIVERSES[args.universe]
+    if args.command == 'start':
+        print(start_refresh(tickers, args.shard_size, not args.restart, args.queue, args.universe))
+    elif args.command == 'worker':
+        print(run_worker(args.run_id, threads=args.threads, path=args.queue))
+    elif args.command == 'run':
+        run_id = args.run_id or start_refresh(tickers, args.shard_size, not args.restart, args.queue, args.universe)
+        workers = [
+            multiprocessing.Process(target=_worker_process, args=(run_id, args.threads, args.queue))
+            for _ in range(args.processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        print(run_status(run_id, args.queue))
+    else:
+        print(run_status(args.run_id, args.queue))
+
+
+if __name__ == '__main__':
+    main()